@@ -22,6 +22,7 @@ const pyinstallerCmd = `
   --hidden-import=asyncio
   --hidden-import=sqlite3
   --hidden-import=json
+  --hidden-import=orjson
   --hidden-import=base64
   --hidden-import=pandas
   --hidden-import=openpyxl
@@ -135,9 +135,13 @@ ipcMain.handle('python-call', async (event, method, params) => {
       case 'process_omr_image':
         return await pythonBridge.processOMRImage(params.examId, params.imageData, params.studentId);
       case 'batch_process_omr':
-        return await pythonBridge.batchProcessOMR(params.examId, params.imagesData);
+        return await pythonBridge.batchProcessOMR(params.examId, params.imagesData, (progress) => {
+          event.sender.send('batch-progress', progress);
+        }, params.autoSave, params.imagePaths);
       case 'save_result':
         return await pythonBridge.saveResult(params);
+      case 'save_results_bulk':
+        return await pythonBridge.saveResultsBulk(params.results);
       case 'get_results':
         return await pythonBridge.getResults(params.examId);
       case 'get_all_results':
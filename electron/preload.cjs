@@ -1,4 +1,4 @@
-const { contextBridge, ipcRenderer } = require('electron');
+const { contextBridge, ipcRenderer, webUtils } = require('electron');
 
 // Expose protected methods that allow the renderer process to use
 // the ipcRenderer without exposing the entire object
@@ -15,6 +15,13 @@ contextBridge.exposeInMainWorld('electronAPI', {
 
   // Python bridge communication
   pythonCall: (method, params) => ipcRenderer.invoke('python-call', method, params),
+  // Absolute path of a dropped/selected File, so images can be read from disk instead of sent as base64
+  getPathForFile: (file) => webUtils.getPathForFile(file),
+  onBatchProgress: (listener) => {
+    const handler = (event, progress) => listener(progress);
+    ipcRenderer.on('batch-progress', handler);
+    return () => ipcRenderer.removeListener('batch-progress', handler);
+  },
 
   // Specific API methods for easier use
   api: {
@@ -33,10 +40,12 @@ contextBridge.exposeInMainWorld('electronAPI', {
     
     // OMR Processing
     processOMRImage: (examId, imageData, studentId) => ipcRenderer.invoke('python-call', 'process_omr_image', { examId, imageData, studentId }),
-    batchProcessOMR: (examId, imagesData) => ipcRenderer.invoke('python-call', 'batch_process_omr', { examId, imagesData }),
+    batchProcessOMR: (examId, imagesData, autoSave = false) => ipcRenderer.invoke('python-call', 'batch_process_omr', { examId, imagesData, autoSave }),
+    batchProcessOMRFiles: (examId, imagePaths, autoSave = false) => ipcRenderer.invoke('python-call', 'batch_process_omr', { examId, imagePaths, autoSave }),
     
     // Results
     saveResult: (resultData) => ipcRenderer.invoke('python-call', 'save_result', resultData),
+    saveResultsBulk: (results) => ipcRenderer.invoke('python-call', 'save_results_bulk', { results }),
     getResults: (examId) => ipcRenderer.invoke('python-call', 'get_results', { examId }),
     getAllResults: () => ipcRenderer.invoke('python-call', 'get_all_results', {}),
     
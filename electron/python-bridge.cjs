@@ -1,6 +1,10 @@
 const { spawn } = require('child_process');
 const path = require('path');
 const fs = require('fs');
+const net = require('net');
+const os = require('os');
+
+const RESULTS_PAGE_SIZE = 200;
 
 class PythonBridge {
   constructor() {
@@ -8,7 +12,11 @@ class PythonBridge {
     this.isReady = false;
     this.messageQueue = [];
     this.callbacks = new Map();
+    this.progressCallbacks = new Map();
     this.messageId = 0;
+    this.stdoutBuffer = '';
+    this.socket = null;
+    this.socketBuffer = Buffer.alloc(0);
   }
 
   async initialize(isDev = false) {
@@ -26,12 +34,18 @@ class PythonBridge {
           PYTHONPATH: isDev ? path.join(__dirname, '..', 'pServer') : path.dirname(pythonPath)
         };
 
+        // Large payloads go over a Unix domain socket; Windows stays on stdio
+        if (process.platform !== 'win32') {
+          env.OMR_BRIDGE_SOCKET = path.join(os.tmpdir(), `omr-bridge-${process.pid}.sock`);
+        }
+
         this.pythonProcess = spawn(pythonPath, [], {
           stdio: ['pipe', 'pipe', 'pipe'],
           env: env,
           cwd: isDev ? path.join(__dirname, '..', 'pServer') : path.dirname(pythonPath)
         });
 
+        this.pythonProcess.stdout.setEncoding('utf8');
         this.pythonProcess.stdout.on('data', (data) => {
           this.handlePythonMessage(data.toString());
         });
@@ -83,22 +97,19 @@ class PythonBridge {
 
   handlePythonMessage(data) {
     try {
-      const lines = data.trim().split('\n');
+      // Python batches several messages per write, and a message can span chunks
+      this.stdoutBuffer += data;
+      const lines = this.stdoutBuffer.split('\n');
+      this.stdoutBuffer = lines.pop();
       for (const line of lines) {
         if (line.startsWith('RESPONSE:')) {
-          const response = JSON.parse(line.substring(9));
-          const callback = this.callbacks.get(response.id);
-          if (callback) {
-            callback(null, response.result);
-            this.callbacks.delete(response.id);
-          }
+          this.dispatchMessage('RESPONSE', JSON.parse(line.substring(9)));
         } else if (line.startsWith('ERROR:')) {
-          const error = JSON.parse(line.substring(6));
-          const callback = this.callbacks.get(error.id);
-          if (callback) {
-            callback(new Error(error.message), null);
-            this.callbacks.delete(error.id);
-          }
+          this.dispatchMessage('ERROR', JSON.parse(line.substring(6)));
+        } else if (line.startsWith('PROGRESS:')) {
+          this.dispatchMessage('PROGRESS', JSON.parse(line.substring(9)));
+        } else if (line.startsWith('SOCKET:')) {
+          this.connectSocket(JSON.parse(line.substring(7)).path);
         }
       }
     } catch (error) {
@@ -106,21 +117,77 @@ class PythonBridge {
     }
   }
 
+  dispatchMessage(type, message) {
+    if (type === 'PROGRESS') {
+      const onProgress = this.progressCallbacks.get(message.id);
+      if (onProgress) onProgress(message);
+      return;
+    }
+    const callback = this.callbacks.get(message.id);
+    if (!callback) return;
+    if (type === 'RESPONSE') {
+      callback(null, message.result);
+    } else if (type === 'ERROR') {
+      callback(new Error(message.message), null);
+    }
+    this.callbacks.delete(message.id);
+    this.progressCallbacks.delete(message.id);
+  }
+
+  connectSocket(socketPath) {
+    const socket = net.createConnection(socketPath);
+
+    socket.on('connect', () => {
+      this.socket = socket;
+    });
+
+    // Frames are a 4-byte big-endian length followed by a JSON body
+    socket.on('data', (chunk) => {
+      this.socketBuffer = Buffer.concat([this.socketBuffer, chunk]);
+      while (this.socketBuffer.length >= 4) {
+        const length = this.socketBuffer.readUInt32BE(0);
+        if (this.socketBuffer.length < 4 + length) break;
+        const body = this.socketBuffer.subarray(4, 4 + length);
+        this.socketBuffer = this.socketBuffer.subarray(4 + length);
+        try {
+          const message = JSON.parse(body.toString('utf8'));
+          this.dispatchMessage(message.type, message);
+        } catch (error) {
+          console.error('Error parsing Python message:', error);
+        }
+      }
+    });
+
+    socket.on('error', (error) => {
+      console.error('Python socket error:', error);
+    });
+
+    socket.on('close', () => {
+      if (this.socket === socket) {
+        this.socket = null;
+      }
+      this.socketBuffer = Buffer.alloc(0);
+    });
+  }
+
   processMessageQueue() {
     while (this.messageQueue.length > 0) {
-      const { method, params, callback } = this.messageQueue.shift();
-      this.callPython(method, params, callback);
+      const { method, params, callback, onProgress } = this.messageQueue.shift();
+      this.callPython(method, params, callback, onProgress);
     }
   }
 
-  callPython(method, params = {}, callback) {
+  callPython(method, params = {}, callback, onProgress) {
     if (!this.isReady) {
-      this.messageQueue.push({ method, params, callback });
+      this.messageQueue.push({ method, params, callback, onProgress });
       return;
     }
 
     const messageId = ++this.messageId;
     this.callbacks.set(messageId, callback);
+    if (onProgress) {
+      this.progressCallbacks.set(messageId, onProgress);
+    }
 
     const message = {
       id: messageId,
@@ -129,10 +196,18 @@ class PythonBridge {
     };
 
     try {
-      this.pythonProcess.stdin.write(JSON.stringify(message) + '\n');
+      if (this.socket) {
+        const body = Buffer.from(JSON.stringify(message), 'utf8');
+        const header = Buffer.alloc(4);
+        header.writeUInt32BE(body.length, 0);
+        this.socket.write(Buffer.concat([header, body]));
+      } else {
+        this.pythonProcess.stdin.write(JSON.stringify(message) + '\n');
+      }
     } catch (error) {
       callback(error, null);
       this.callbacks.delete(messageId);
+      this.progressCallbacks.delete(messageId);
     }
   }
 
@@ -209,12 +284,14 @@ class PythonBridge {
     });
   }
 
-  async batchProcessOMR(examId, imagesData) {
+  async batchProcessOMR(examId, imagesData, onProgress, autoSave = false, imagePaths = null) {
+    // Image paths let Python read the files directly; base64 data is only sent without them
+    const params = imagePaths ? { examId, imagePaths, autoSave } : { examId, imagesData, autoSave };
     return new Promise((resolve, reject) => {
-      this.callPython('batch_process_omr', { examId, imagesData }, (error, result) => {
+      this.callPython('batch_process_omr', params, (error, result) => {
         if (error) reject(error);
         else resolve(result);
-      });
+      }, onProgress);
     });
   }
 
@@ -227,22 +304,38 @@ class PythonBridge {
     });
   }
 
-  async getResults(examId) {
+  async saveResultsBulk(results) {
     return new Promise((resolve, reject) => {
-      this.callPython('get_results', { examId }, (error, result) => {
+      this.callPython('save_results_bulk', { results }, (error, result) => {
         if (error) reject(error);
         else resolve(result);
       });
     });
   }
 
+  async getResults(examId) {
+    return this.fetchAllPages('get_results', { examId });
+  }
+
   async getAllResults() {
-    return new Promise((resolve, reject) => {
-      this.callPython('get_all_results', {}, (error, result) => {
-        if (error) reject(error);
-        else resolve(result);
+    return this.fetchAllPages('get_all_results', {});
+  }
+
+  // Pull a paginated result set one bounded page per IPC message
+  async fetchAllPages(method, params) {
+    const rows = [];
+    let cursor = null;
+    do {
+      const page = await new Promise((resolve, reject) => {
+        this.callPython(method, { ...params, limit: RESULTS_PAGE_SIZE, cursor }, (error, result) => {
+          if (error) reject(error);
+          else resolve(result);
+        });
       });
-    });
+      rows.push(...page.rows);
+      cursor = page.nextCursor;
+    } while (cursor);
+    return rows;
   }
 
   async generateOMRSheets(examId) {
@@ -282,12 +375,17 @@ class PythonBridge {
   }
 
   terminate() {
+    if (this.socket) {
+      this.socket.destroy();
+      this.socket = null;
+    }
     if (this.pythonProcess) {
       this.pythonProcess.kill('SIGTERM');
       this.pythonProcess = null;
     }
     this.isReady = false;
     this.callbacks.clear();
+    this.progressCallbacks.clear();
     this.messageQueue = [];
   }
 }
@@ -1,50 +1,229 @@
 #!/usr/bin/env python3
 """
 Python Bridge for Electron App
-Handles direct communication with Electron main process via stdin/stdout
+Handles direct communication with Electron main process via stdin/stdout,
+or via length-prefixed frames on a Unix domain socket when OMR_BRIDGE_SOCKET is set
 """
 
 import sys
-import json
+import orjson
 import asyncio
 import logging
 import traceback
-from datetime import datetime
+import threading
+import contextvars
+import time
+import struct
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
 import base64
+import secrets
 import io
 import os
+import mmap
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Largest single request line accepted on stdin (batches carry base64 images)
+STDIN_LINE_LIMIT = 1024 * 1024 * 1024
+
+# How long exam and solution lookups are served from memory, in seconds
+CACHE_TTL = 60
+
+# Images a batch keeps in flight per CPU core; bounds memory on large batches
+BATCH_IMAGES_PER_CPU = 2
+
+# Reused output buffer for stdout messages; larger messages are written straight through
+STDOUT_BUFFER_SIZE = 64 * 1024
+
+# Default page size when results are requested with a limit/cursor
+RESULTS_PAGE_SIZE = 200
+MAX_RESULTS_PAGE_SIZE = 500
+
+# Socket frames are a 4-byte big-endian length followed by a JSON body
+FRAME_HEADER = struct.Struct(">I")
+
+
+def dumps(obj):
+    """Serialize to JSON bytes; numpy values and datetimes pass straight through"""
+    return orjson.dumps(obj, default=str, option=orjson.OPT_SERIALIZE_NUMPY)
+
 # Import our modules
 from database import database, db_operations
 from models.exam import ExamCreate, ExamUpdate
 from models.student import StudentCreate
 from models.solution import Solution, SolutionItem
 from models.result import ResultCreate
-from models.scan import process_omr_image
+from models.scan import process_omr_image, warm_up
+from models.omr_sheet import mcq_questions
 import pandas as pd
 
+def _process_image_worker(image_data_b64, answer_key, num_questions, student_id):
+    """Decode and process one OMR image inside a pool worker process"""
+    image_data = base64.b64decode(image_data_b64)
+    return process_omr_image(
+        image_data=image_data,
+        answer_key=answer_key,
+        num_questions=num_questions,
+        student_id=student_id
+    )
+
+def _process_image_file_worker(image_path, answer_key, num_questions, student_id):
+    """Map an image file read-only and process it inside a pool worker process"""
+    with open(image_path, "rb") as f:
+        image_data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        return process_omr_image(
+            image_data=image_data,
+            answer_key=answer_key,
+            num_questions=num_questions,
+            student_id=student_id
+        )
+    finally:
+        try:
+            image_data.close()
+        except BufferError:
+            # A pending traceback still views the buffer; the map is freed along with it
+            pass
+
+def _result_row(exam, result, processed_at):
+    """Build a results table row from a successful batch result"""
+    return {
+        "examId": exam["examId"],
+        "studentId": result["studentId"],
+        "examName": exam["name"],
+        "responses": result["responses"],
+        "score": result["score"],
+        "totalMarks": result["totalMarks"],
+        "percentage": result["percentage"],
+        "passFailStatus": "Pass" if result["percentage"] >= exam["passingPercentage"] else "Fail",
+        "correctAnswers": result["correctAnswers"],
+        "incorrectAnswers": result["incorrectAnswers"],
+        "blankAnswers": result["blankAnswers"],
+        "multipleMarks": result["multipleMarks"],
+        "sponsorDS": exam["sponsorDS"],
+        "course": exam["course"],
+        "wing": exam["wing"],
+        "module": exam["module"],
+        "processedAt": processed_at
+    }
+
+def _make_result(processing_result, student_id, filename, marks_per_mcq, total_marks):
+    """Build a batch result entry from a processed image and precomputed exam constants"""
+    score = processing_result['score'] * marks_per_mcq
+    return {
+        "studentId": student_id,
+        "filename": filename,
+        "score": score,
+        "totalMarks": total_marks,
+        "percentage": (score / total_marks * 100) if total_marks > 0 else 0,
+        "accuracy": processing_result["accuracy"],
+        "responses": processing_result["responses"],
+        "correctAnswers": processing_result["correct_answers"],
+        "incorrectAnswers": processing_result["incorrect_answers"],
+        "blankAnswers": processing_result["blank_answers"],
+        "multipleMarks": processing_result["multiple_marks"],
+        "invalidAnswers": processing_result["invalid_answers"],
+        "processingMetadata": processing_result["processing_metadata"],
+        "success": True
+    }
+
+# (send, message id) of the request being handled, for progress updates
+_current_request = contextvars.ContextVar("current_request", default=None)
+
+# Methods Electron is allowed to call; anything else is rejected
+RPC_METHODS = (
+    'create_exam', 'get_exams', 'get_exam',
+    'upload_students', 'get_students',
+    'upload_solution', 'get_solution',
+    'process_omr_image', 'batch_process_omr',
+    'save_result', 'save_results_bulk', 'get_results', 'get_all_results',
+    'generate_omr_sheets', 'download_omr_sheets',
+    'get_settings', 'update_settings',
+)
+
 class PythonBridge:
     def __init__(self):
         self.db_initialized = False
+        self._db_lock = asyncio.Lock()
+        self._pool = None
+        self._stdout = None
+        self._flush_scheduled = False
+        self._connections = set()
+        self._rpc = {name: getattr(self, name) for name in RPC_METHODS}
+        self._exam_cache = {}
+        self._solution_cache = {}
+        self._request_locks = {}
+
+    def get_process_pool(self):
+        """Return the shared worker pool for CPU-bound OMR processing"""
+        if self._pool is None:
+            # Spawn rather than fork: the pool starts after aiosqlite's threads are running,
+            # and forking a multithreaded process can leave workers stuck on copied locks
+            self._pool = ProcessPoolExecutor(
+                max_workers=os.cpu_count(),
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    def warm_up_pool(self):
+        """Start every worker and warm its OpenCV/NumPy state in the background"""
+        pool = self.get_process_pool()
+        for _ in range(os.cpu_count() or 1):
+            pool.submit(warm_up)
         
     async def initialize_database(self):
         """Initialize the database connection"""
-        if not self.db_initialized:
+        if self.db_initialized:
+            return
+        async with self._db_lock:
+            if self.db_initialized:
+                return
             try:
                 # Get database path from environment or use default
                 db_path = os.getenv("DATABASE_PATH", "omr_database.db")
                 database.db_path = db_path
                 await database.connect()
                 self.db_initialized = True
+                # Have the first batch find the worker processes already running
+                self.warm_up_pool()
                 logger.info(f"Database initialized at {db_path}")
             except Exception as e:
                 logger.error(f"Failed to initialize database: {e}")
                 raise
 
+    async def _get_exam_cached(self, exam_id):
+        """Look up an exam, reusing a copy fetched within the last CACHE_TTL seconds"""
+        entry = self._exam_cache.get(exam_id)
+        if entry and time.monotonic() - entry[0] < CACHE_TTL:
+            return entry[1]
+        exam = await db_operations.find_one('exams', {"examId": exam_id})
+        if exam:
+            self._exam_cache[exam_id] = (time.monotonic(), exam)
+        return exam
+
+    async def _get_solution_cached(self, exam_id):
+        """Look up an exam's solution along with its answer key, ordered by question as a tuple"""
+        entry = self._solution_cache.get(exam_id)
+        if entry and time.monotonic() - entry[0] < CACHE_TTL:
+            return entry[1]
+        solution = await db_operations.find_one('solutions', {"examId": exam_id})
+        if not solution:
+            return None
+        # Uploads are stored pre-sorted, so this sort is a single linear pass
+        answer_key = tuple(sol['answer'] for sol in sorted(solution['solutions'], key=lambda x: x['question']))
+        cached = {'raw': solution, 'answer_key': answer_key}
+        self._solution_cache[exam_id] = (time.monotonic(), cached)
+        return cached
+
+    def _invalidate_exam(self, exam_id):
+        """Drop cached lookups for an exam after it has been written to"""
+        self._exam_cache.pop(exam_id, None)
+        self._solution_cache.pop(exam_id, None)
+
     async def create_exam(self, params):
         """Create a new exam"""
         try:
@@ -52,7 +231,7 @@ class PythonBridge:
             
             # Generate examId if not provided
             if not params.get('examId'):
-                params['examId'] = f"EXAM_{int(datetime.utcnow().timestamp())}_{hash(params['name']) % 10000}"
+                params['examId'] = f"EXAM_{int(time.time())}_{secrets.token_hex(4)}"
             
             # Prepare exam data
             exam_data = {
@@ -71,11 +250,12 @@ class PythonBridge:
                 'settings': params.get('settings', {}),
                 'studentsUploaded': False,
                 'solutionUploaded': False,
-                'createdAt': datetime.utcnow(),
+                'createdAt': time.time_ns(),
                 'createdBy': 'System'
             }
             
             await db_operations.insert_one('exams', exam_data)
+            self._invalidate_exam(params['examId'])
             
             return {
                 'examId': params['examId'],
@@ -99,7 +279,7 @@ class PythonBridge:
         """Get a specific exam"""
         try:
             await self.initialize_database()
-            exam = await db_operations.find_one('exams', {"examId": params['examId']})
+            exam = await self._get_exam_cached(params['examId'])
             if not exam:
                 raise ValueError("Exam not found")
             return exam
@@ -116,36 +296,34 @@ class PythonBridge:
             students_data = params['studentsData']
             
             # Verify exam exists
-            exam = await db_operations.find_one('exams', {"examId": exam_id})
+            exam = await self._get_exam_cached(exam_id)
             if not exam:
                 raise ValueError("Exam not found")
             
-            # Clear existing students for this exam
-            await db_operations.delete_many('students', {"examId": exam_id})
-            
-            # Process and save students
-            students = []
-            for i, student_data in enumerate(students_data):
-                student = {
+            # Process students
+            created_at = time.time_ns()
+            students = [
+                {
                     "examId": exam_id,
                     "name": str(student_data['name']).strip(),
                     "lockerNumber": str(student_data['lockerNumber']).strip(),
                     "rank": str(student_data['rank']).strip(),
                     "copyNumber": str(i + 1).zfill(3),
-                    "createdAt": datetime.utcnow()
+                    "createdAt": created_at
                 }
-                students.append(student)
-            
-            # Insert students
-            for student in students:
-                await db_operations.insert_one('students', student)
-            
-            # Update exam to mark students as uploaded
-            await db_operations.update_one(
-                'exams',
-                {"examId": exam_id},
-                {"studentsUploaded": True}
-            )
+                for i, student_data in enumerate(students_data)
+            ]
+
+            # Replace the student list and flag the exam in a single transaction
+            async with db_operations.transaction():
+                await db_operations.delete_many('students', {"examId": exam_id})
+                await db_operations.insert_many('students', students)
+                await db_operations.update_one(
+                    'exams',
+                    {"examId": exam_id},
+                    {"studentsUploaded": True}
+                )
+            self._invalidate_exam(exam_id)
             
             return {
                 "message": "Students uploaded successfully",
@@ -183,28 +361,26 @@ class PythonBridge:
             solutions_data = params['solutionsData']
             
             # Verify exam exists
-            exam = await db_operations.find_one('exams', {"examId": exam_id})
+            exam = await self._get_exam_cached(exam_id)
             if not exam:
                 raise ValueError("Exam not found")
             
-            # Delete existing solution
-            await db_operations.delete_one('solutions', {"examId": exam_id})
-            
-            # Create new solution
+            # Create new solution, stored in question order
             solution_data = {
                 'examId': exam_id,
-                'solutions': solutions_data,
-                'uploadedAt': datetime.utcnow()
+                'solutions': sorted(solutions_data, key=lambda x: x['question']),
+                'uploadedAt': time.time_ns()
             }
             
-            await db_operations.insert_one('solutions', solution_data)
-            
-            # Update exam to mark solution as uploaded
-            await db_operations.update_one(
-                'exams',
-                {"examId": exam_id},
-                {"solutionUploaded": True}
-            )
+            # Replace the answer key and flag the exam in a single transaction
+            async with db_operations.transaction():
+                await db_operations.upsert_one('solutions', {"examId": exam_id}, solution_data)
+                await db_operations.update_one(
+                    'exams',
+                    {"examId": exam_id},
+                    {"solutionUploaded": True}
+                )
+            self._invalidate_exam(exam_id)
             
             return {
                 "message": "Solution uploaded successfully",
@@ -218,10 +394,10 @@ class PythonBridge:
         """Get solution for an exam"""
         try:
             await self.initialize_database()
-            solution = await db_operations.find_one('solutions', {"examId": params['examId']})
+            solution = await self._get_solution_cached(params['examId'])
             if not solution:
                 raise ValueError("Solution not found")
-            return solution
+            return solution['raw']
         except Exception as e:
             logger.error(f"Error getting solution: {e}")
             raise
@@ -232,28 +408,34 @@ class PythonBridge:
             await self.initialize_database()
             
             exam_id = params['examId']
-            image_data = base64.b64decode(params['imageData'])
+            image_path = params.get('imagePath')
             student_id = params['studentId']
             
             # Get exam details
-            exam = await db_operations.find_one('exams', {"examId": exam_id})
+            exam = await self._get_exam_cached(exam_id)
             if not exam:
                 raise ValueError("Exam not found")
             
             # Get solution
-            solution = await db_operations.find_one('solutions', {"examId": exam_id})
+            solution = await self._get_solution_cached(exam_id)
             if not solution:
                 raise ValueError("Solution not found")
             
-            # Extract answer key
-            answer_key = [sol['answer'] for sol in sorted(solution['solutions'], key=lambda x: x['question'])]
+            answer_key = solution['answer_key']
             
-            # Process the OMR image
-            result = process_omr_image(
-                image_data=image_data,
-                answer_key=answer_key,
-                num_questions=exam['numQuestions'],
-                student_id=student_id
+            # Process the OMR image in the worker pool, read from disk when Electron
+            # passes a file path, so other RPCs keep being served meanwhile
+            if image_path:
+                worker, image = _process_image_file_worker, image_path
+            else:
+                worker, image = _process_image_worker, params['imageData']
+            result = await asyncio.get_running_loop().run_in_executor(
+                self.get_process_pool(),
+                worker,
+                image,
+                answer_key,
+                exam['numQuestions'],
+                student_id
             )
             
             # Calculate additional metrics
@@ -291,72 +473,85 @@ class PythonBridge:
             await self.initialize_database()
             
             exam_id = params['examId']
-            images_data = params['imagesData']
+            # Image files on disk are mapped by the workers; base64 payloads are the fallback
+            image_paths = params.get('imagePaths')
+            if image_paths:
+                images_data, worker = image_paths, _process_image_file_worker
+            else:
+                images_data, worker = params['imagesData'], _process_image_worker
             
             # Get exam details
-            exam = await db_operations.find_one('exams', {"examId": exam_id})
+            exam = await self._get_exam_cached(exam_id)
             if not exam:
                 raise ValueError("Exam not found")
             
             # Get solution
-            solution = await db_operations.find_one('solutions', {"examId": exam_id})
+            solution = await self._get_solution_cached(exam_id)
             if not solution:
                 raise ValueError("Solution not found")
             
-            # Extract answer key
-            answer_key = [sol['answer'] for sol in sorted(solution['solutions'], key=lambda x: x['question'])]
+            # Freeze the per-exam constants once for the whole batch
+            answer_key = solution['answer_key']
+            num_questions = exam['numQuestions']
+            marks_per_mcq = exam['marksPerMcq']
+            total_marks = num_questions * marks_per_mcq
+            
+            # Fan the CPU-bound decoding and processing out across worker processes,
+            # keeping only a few images per core in flight at once
+            loop = asyncio.get_running_loop()
+            pool = self.get_process_pool()
+            semaphore = asyncio.Semaphore(BATCH_IMAGES_PER_CPU * (os.cpu_count() or 1))
+            total = len(images_data)
+            results = [None] * total
+            completed = 0
+
+            async def process(i):
+                nonlocal completed
+                student_id = f"STUDENT_{str(i+1).zfill(3)}"
+                filename = f"image_{i+1}"
+                async with semaphore:
+                    try:
+                        processing_result = await loop.run_in_executor(
+                            pool,
+                            worker,
+                            images_data[i],
+                            answer_key,
+                            num_questions,
+                            student_id
+                        )
+                        result = _make_result(processing_result, student_id, filename, marks_per_mcq, total_marks)
+                    except Exception as e:
+                        logger.error(f"Failed to process image {i+1}: {str(e)}")
+                        result = {
+                            "studentId": student_id,
+                            "filename": filename,
+                            "success": False,
+                            "error": str(e)
+                        }
+                results[i] = result
+                completed += 1
+                self.report_progress({
+                    "completed": completed,
+                    "total": total,
+                    "studentId": student_id,
+                    "success": result["success"]
+                })
+
+            await asyncio.gather(*(process(i) for i in range(total)))
             
-            results = []
-            for i, image_data_b64 in enumerate(images_data):
-                try:
-                    student_id = f"STUDENT_{str(i+1).zfill(3)}"
-                    image_data = base64.b64decode(image_data_b64)
-                    
-                    # Process the OMR image
-                    processing_result = process_omr_image(
-                        image_data=image_data,
-                        answer_key=answer_key,
-                        num_questions=exam['numQuestions'],
-                        student_id=student_id
-                    )
-                    
-                    # Calculate metrics
-                    total_marks = exam['numQuestions'] * exam['marksPerMcq']
-                    score = processing_result['score'] * exam['marksPerMcq']
-                    percentage = (score / total_marks * 100) if total_marks > 0 else 0
-                    
-                    result_data = {
-                        "studentId": student_id,
-                        "filename": f"image_{i+1}",
-                        "score": score,
-                        "totalMarks": total_marks,
-                        "percentage": percentage,
-                        "accuracy": processing_result["accuracy"],
-                        "responses": processing_result["responses"],
-                        "correctAnswers": processing_result["correct_answers"],
-                        "incorrectAnswers": processing_result["incorrect_answers"],
-                        "blankAnswers": processing_result["blank_answers"],
-                        "multipleMarks": processing_result["multiple_marks"],
-                        "invalidAnswers": processing_result["invalid_answers"],
-                        "processingMetadata": processing_result["processing_metadata"],
-                        "success": True
-                    }
-                    
-                    results.append(result_data)
-                    
-                except Exception as e:
-                    logger.error(f"Failed to process image {i+1}: {str(e)}")
-                    results.append({
-                        "studentId": f"STUDENT_{str(i+1).zfill(3)}",
-                        "filename": f"image_{i+1}",
-                        "success": False,
-                        "error": str(e)
-                    })
+            # Persist successful results here rather than one save_result RPC per image
+            if params.get('autoSave'):
+                processed_at = time.time_ns()
+                await db_operations.upsert_many(
+                    'results',
+                    ('examId', 'studentId'),
+                    [_result_row(exam, r, processed_at) for r in results if r["success"]]
+                )
             
             return {
                 "success": True,
                 "examId": exam_id,
-                "totalImages": len(images_data),
+                "totalImages": total,
                 "processedSuccessfully": len([r for r in results if r.get("success", False)]),
                 "results": results
             }
@@ -370,34 +565,48 @@ class PythonBridge:
             await self.initialize_database()
             
             result_data = params.copy()
-            result_data["processedAt"] = datetime.utcnow()
+            result_data["processedAt"] = time.time_ns()
             
-            # Check if result already exists
-            existing_result = await db_operations.find_one('results', {
-                "examId": result_data["examId"],
-                "studentId": result_data["studentId"]
-            })
-            
-            if existing_result:
-                # Update existing result
-                await db_operations.update_one(
-                    'results',
-                    {"examId": result_data["examId"], "studentId": result_data["studentId"]},
-                    result_data
-                )
-            else:
-                # Create new result
-                await db_operations.insert_one('results', result_data)
+            # Insert or overwrite the student's result in one statement
+            await db_operations.upsert('results', ('examId', 'studentId'), result_data)
             
             return {"message": "Result saved successfully"}
         except Exception as e:
             logger.error(f"Error saving result: {e}")
             raise
 
+    async def save_results_bulk(self, params):
+        """Save many results to the database in one transaction"""
+        try:
+            await self.initialize_database()
+            
+            processed_at = time.time_ns()
+            results = [{**result, "processedAt": processed_at} for result in params['results']]
+            
+            count = await db_operations.upsert_many('results', ('examId', 'studentId'), results)
+            
+            return {"message": f"Successfully saved {count} results", "count": count}
+        except Exception as e:
+            logger.error(f"Error saving results: {e}")
+            raise
+
+    async def _results_page(self, filter_dict, params):
+        """One page of results, newest first, continuing from params['cursor']"""
+        rows, next_cursor = await db_operations.find_page(
+            'results',
+            filter_dict,
+            sort_by="processedAt",
+            limit=min(params.get('limit') or RESULTS_PAGE_SIZE, MAX_RESULTS_PAGE_SIZE),
+            cursor=params.get('cursor')
+        )
+        return {"rows": rows, "nextCursor": next_cursor}
+
     async def get_results(self, params):
         """Get results for an exam"""
         try:
             await self.initialize_database()
+            if 'limit' in params or 'cursor' in params:
+                return await self._results_page({"examId": params['examId']}, params)
             results = await db_operations.find_many('results', {"examId": params['examId']}, sort_by="processedAt", sort_order="DESC")
             return results
         except Exception as e:
@@ -408,6 +617,8 @@ class PythonBridge:
         """Get all results"""
         try:
             await self.initialize_database()
+            if 'limit' in params or 'cursor' in params:
+                return await self._results_page(None, params)
             results = await db_operations.find_many('results', sort_by="processedAt", sort_order="DESC")
             return results
         except Exception as e:
@@ -422,7 +633,7 @@ class PythonBridge:
             exam_id = params['examId']
             
             # Get exam details
-            exam = await db_operations.find_one('exams', {"examId": exam_id})
+            exam = await self._get_exam_cached(exam_id)
             if not exam:
                 raise ValueError("Exam not found")
             
@@ -488,13 +699,7 @@ class PythonBridge:
                         "instructions": exam.get("instructions", "Fill bubbles neatly with a black/blue pen, mark only one option per question—any extra, unclear, or incorrect marking will be considered wrong.")
                     },
                     "mcqSection": {
-                        "questions": [
-                            {
-                                "number": i + 1,
-                                "options": ["A", "B", "C", "D", "E"]
-                            }
-                            for i in range(exam["numQuestions"])
-                        ]
+                        "questions": mcq_questions(exam["numQuestions"])
                     },
                     "footer": {
                         "studentSignature": "",
@@ -561,28 +766,79 @@ class PythonBridge:
             logger.error(f"Error updating settings: {e}")
             raise
 
-    async def handle_message(self, message):
+    def send(self, kind, payload):
+        """Queue a stdout message; everything queued in one loop tick is flushed together"""
+        if self._stdout is None:
+            self._stdout = open(sys.stdout.fileno(), "wb", buffering=STDOUT_BUFFER_SIZE, closefd=False)
+        # Write the pieces into the reused buffer rather than concatenating a new bytes object
+        self._stdout.write(kind.encode() + b":")
+        self._stdout.write(dumps(payload))
+        self._stdout.write(b"\n")
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            asyncio.get_running_loop().call_soon(self._flush)
+
+    def report_progress(self, payload):
+        """Send a PROGRESS message for the request currently being handled"""
+        request = _current_request.get()
+        if request is not None:
+            send, message_id = request
+            send("PROGRESS", {'id': message_id, **payload})
+
+    def _flush(self):
+        """Write all queued messages to stdout"""
+        self._flush_scheduled = False
+        self._stdout.flush()
+
+    @asynccontextmanager
+    async def _in_arrival_order(self, key):
+        """Hold back a request until earlier requests with the same key have finished.
+
+        Requests run as concurrent tasks, so without this a get_solution sent right
+        behind an upload_solution for the same exam could run first. asyncio.Lock wakes
+        waiters first in, first out, and tasks reach it in the order they arrived.
+        """
+        entry = self._request_locks.get(key)
+        if entry is None:
+            entry = self._request_locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._request_locks[key]
+
+    async def handle_message(self, message, send=None):
         """Handle incoming message from Electron"""
+        send = send or self.send
         try:
-            data = json.loads(message.strip())
+            data = orjson.loads(message)
             method = data.get('method')
             params = data.get('params', {})
             message_id = data.get('id')
+            _current_request.set((send, message_id))
             
             # Call the appropriate method
-            if hasattr(self, method):
-                result = await getattr(self, method)(params)
+            handler = self._rpc.get(method)
+            if handler is not None:
+                # Calls for one exam keep their order; calls without an examId
+                # (create_exam, get_exams, settings, ...) are ordered among themselves
+                key = params.get('examId') if isinstance(params, dict) else None
+                async with self._in_arrival_order(key):
+                    result = await handler(params)
                 response = {
                     'id': message_id,
                     'result': result
                 }
-                print(f"RESPONSE:{json.dumps(response)}", flush=True)
+                send("RESPONSE", response)
             else:
                 error_response = {
                     'id': message_id,
                     'message': f'Unknown method: {method}'
                 }
-                print(f"ERROR:{json.dumps(error_response)}", flush=True)
+                send("ERROR", error_response)
                 
         except Exception as e:
             logger.error(f"Error handling message: {e}")
@@ -591,24 +847,106 @@ class PythonBridge:
                 'id': data.get('id') if 'data' in locals() else 0,
                 'message': str(e)
             }
-            print(f"ERROR:{json.dumps(error_response)}", flush=True)
+            send("ERROR", error_response)
+
+    async def open_stdin_reader(self):
+        """Wrap stdin in an asyncio StreamReader without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader(limit=STDIN_LINE_LIMIT)
+        try:
+            await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+        except (NotImplementedError, OSError, ValueError):
+            # Windows event loops cannot always watch an anonymous stdin pipe;
+            # feed the reader from a daemon thread instead
+            def pump():
+                for line in iter(sys.stdin.buffer.readline, b""):
+                    loop.call_soon_threadsafe(reader.feed_data, line)
+                loop.call_soon_threadsafe(reader.feed_eof)
+
+            threading.Thread(target=pump, name="stdin-reader", daemon=True).start()
+        return reader
+
+    async def serve_connection(self, reader, writer):
+        """Serve length-prefixed JSON requests from one socket client"""
+        def send(kind, payload):
+            body = dumps({"type": kind, **payload})
+            # Two writes instead of header + body, which would copy the whole body
+            writer.write(FRAME_HEADER.pack(len(body)))
+            writer.write(body)
+
+        pending = set()
+        self._connections.add(writer)
+        try:
+            while True:
+                (length,) = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+                body = await reader.readexactly(length)
+                task = asyncio.create_task(self.handle_message(body, send))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            if pending:
+                await asyncio.gather(*pending)
+            self._connections.discard(writer)
+            writer.close()
+
+    async def start_socket_server(self):
+        """Listen on OMR_BRIDGE_SOCKET if requested and supported on this platform"""
+        socket_path = os.getenv("OMR_BRIDGE_SOCKET")
+        if not socket_path or not hasattr(asyncio, "start_unix_server"):
+            return None
+
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = await asyncio.start_unix_server(self.serve_connection, path=socket_path, limit=STDIN_LINE_LIMIT)
+        self.send("SOCKET", {"path": socket_path})
+        logger.info(f"Python bridge listening on {socket_path}")
+        return server
 
     async def run(self):
         """Main run loop"""
         logger.info("Python bridge started")
         
+        pending = set()
+        server = None
         try:
-            while True:
-                line = sys.stdin.readline()
-                if not line:
-                    break
-                await self.handle_message(line)
+            server = await self.start_socket_server()
+            # stdin stays open as a fallback transport and to detect the parent exiting
+            reader = await self.open_stdin_reader()
+            while line := await reader.readline():
+                if not line.strip():
+                    continue
+                # Handle requests concurrently so a slow call does not hold up calls for
+                # other exams; calls for the same exam still run in arrival order
+                task = asyncio.create_task(self.handle_message(line))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.gather(*pending)
         except KeyboardInterrupt:
             logger.info("Python bridge stopped")
         except Exception as e:
             logger.error(f"Error in main loop: {e}")
             logger.error(traceback.format_exc())
+        finally:
+            if server is not None:
+                server.close()
+                try:
+                    os.unlink(os.environ["OMR_BRIDGE_SOCKET"])
+                except OSError:
+                    pass
+            # The parent has gone away; drop clients still attached to the socket
+            for writer in list(self._connections):
+                writer.close()
+            if self.db_initialized:
+                await db_operations.flush()
+                await database.disconnect()
+            if self._stdout is not None:
+                self._flush()
 
 if __name__ == "__main__":
+    # Required for the worker pool in the frozen (PyInstaller) build
+    multiprocessing.freeze_support()
     bridge = PythonBridge()
     asyncio.run(bridge.run())
\ No newline at end of file
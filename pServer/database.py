@@ -1,24 +1,126 @@
+import os
+import re
 import sqlite3
 import asyncio
+import time
 import aiosqlite
+import contextvars
+from collections import deque
 from contextlib import asynccontextmanager
-from typing import Dict, List, Any, Optional
-import json
-from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+import orjson
+from datetime import datetime, timedelta, timezone
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Set while the current task holds an explicit transaction on the connection
+_in_transaction = contextvars.ContextVar("in_transaction", default=False)
+
+# Connection-level tuning applied once per connection, in one executescript batch.
+# foreign_keys stays off: delete_exam removes the exam row while students/results still reference it.
+PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA busy_timeout=30000",
+]
+PRAGMA_SCRIPT = "".join(f"{pragma};" for pragma in PRAGMAS)
+
+# sqlite3 keeps this many prepared statements per connection, keyed by SQL text
+STATEMENT_CACHE_SIZE = 256
+
+# Seconds a cached response body stays valid; writes to its table drop it sooner
+RESULT_CACHE_TTL = 30
+
+# Standalone writes queued together are committed in one transaction of at most this many statements
+WRITE_BATCH_SIZE = 256
+
+# JSON columns are written as orjson text; nested datetimes are taken as UTC
+JSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY
+
+# Timestamp columns are stored as INTEGER nanoseconds since the Unix epoch (UTC)
+TIMESTAMP_COLUMNS = {"createdAt", "uploadedAt", "processedAt", "generatedAt"}
+
+_EPOCH = datetime(1970, 1, 1)
+_UTC_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# Stands in for an empty JSON column when rows are served as raw JSON
+EMPTY_JSON = orjson.Fragment(b"{}")
+
+# Columns converted when rows are read back; tables are static so this is fixed up front
+TABLE_SCHEMAS = {
+    "exams": {"json_cols": {"settings"}, "bool_cols": {"studentsUploaded", "solutionUploaded"}},
+    "students": {},
+    "solutions": {"json_cols": {"solutions"}},
+    "results": {"json_cols": {"responses", "studentInfo"}},
+    "reports": {"json_cols": {"data"}},
+    "responses": {"json_cols": {"responses", "processingMetadata"}},
+}
+
+def datetime_to_ns(value: datetime) -> int:
+    """Convert a datetime to epoch nanoseconds, treating naive values as UTC"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    delta = value - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000_000 + delta.microseconds * 1000
+
+def ns_to_isoformat(value: int) -> str:
+    """Render epoch nanoseconds as an ISO string with an explicit +00:00 offset"""
+    return (_UTC_EPOCH + timedelta(microseconds=value // 1000)).isoformat()
+
+def utc_timestamp() -> str:
+    """Current UTC time in the same ISO format as stored timestamps, the one format the API emits"""
+    return datetime.now(timezone.utc).isoformat()
+
+def json_text(value: Any) -> Any:
+    """Text to store in a JSON column. Raw-JSON reads embed it verbatim, so a string is
+    kept only if it already parses as JSON; anything else, malformed text included, is encoded.
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        if not value:
+            return value
+        try:
+            orjson.loads(value)
+            return value
+        except orjson.JSONDecodeError:
+            pass
+    return orjson.dumps(value, option=JSON_OPTIONS).decode()
+
+# WAL lets these read concurrently with the single writer connection; one per core
+# by default, each aiosqlite connection having its own thread. Capped because every
+# connection keeps its own page cache (see cache_size above)
+MAX_DEFAULT_READ_CONNECTIONS = 8
+READ_CONNECTIONS = int(os.getenv("DB_READ_CONNECTIONS", min(os.cpu_count() or 4, MAX_DEFAULT_READ_CONNECTIONS)))
+
+# Applied to each read connection after the shared PRAGMAS
+READER_PRAGMAS = [
+    "PRAGMA query_only=ON",
+]
+
 class SQLiteDatabase:
     def __init__(self, db_path: str = "omr_database.db"):
         self.db_path = db_path
         self.connection = None
+        self.readers = []
+        self._next_reader = 0
     
     async def connect(self):
         """Initialize database connection and create tables"""
         try:
-            self.connection = await aiosqlite.connect(self.db_path)
+            self.connection = await aiosqlite.connect(self.db_path, cached_statements=STATEMENT_CACHE_SIZE)
+            self.connection.row_factory = aiosqlite.Row
+            await self.configure()
             await self.create_tables()
+            # An in-memory database is private to its connection, so reads stay on the writer
+            if self.db_path != ":memory:":
+                for _ in range(READ_CONNECTIONS):
+                    self.readers.append(await self.open_reader())
             logger.info(f"SQLite database connected successfully at {self.db_path}")
         except Exception as e:
             logger.error(f"Failed to connect to SQLite database: {e}")
@@ -26,15 +128,67 @@ class SQLiteDatabase:
     
     async def disconnect(self):
         """Close database connection"""
+        for reader in self.readers:
+            await reader.close()
+        self.readers = []
         if self.connection:
             await self.connection.close()
             logger.info("SQLite database connection closed")
     
+    async def configure(self):
+        """Switch to WAL journaling and tune cache/sync settings"""
+        await self.connection.executescript(PRAGMA_SCRIPT)
+    
+    async def open_reader(self) -> aiosqlite.Connection:
+        """Open a read-only connection to the database file"""
+        reader = await aiosqlite.connect(self.db_path, cached_statements=STATEMENT_CACHE_SIZE)
+        reader.row_factory = aiosqlite.Row
+        await reader.executescript(PRAGMA_SCRIPT + "".join(f"{pragma};" for pragma in READER_PRAGMAS))
+        return reader
+    
+    def reader(self) -> aiosqlite.Connection:
+        """Pick a read connection round-robin, falling back to the writer"""
+        if not self.readers:
+            return self.connection
+        self._next_reader = (self._next_reader + 1) % len(self.readers)
+        return self.readers[self._next_reader]
+    
+    async def migrate_timestamps(self, tables: Dict[str, str]):
+        """Rebuild tables created when timestamps were stored as ISO-8601 TEXT"""
+        for table, table_sql in tables.items():
+            cursor = await self.connection.execute(f"PRAGMA table_info({table})")
+            columns = {row[1]: row[2] for row in await cursor.fetchall()}
+            legacy = [column for column in columns if column in TIMESTAMP_COLUMNS and columns[column].upper() == "TEXT"]
+            if not legacy:
+                continue
+            
+            # julianday() reads the stored naive UTC strings; keep millisecond precision
+            select = ", ".join(
+                f"COALESCE(CAST(ROUND((julianday({column}) - 2440587.5) * 86400000) AS INTEGER) * 1000000, 0)"
+                if column in legacy else column
+                for column in columns
+            )
+            new_sql = table_sql.replace(f"CREATE TABLE IF NOT EXISTS {table} (", f"CREATE TABLE {table}_new (", 1)
+            
+            await self.connection.execute("BEGIN")
+            try:
+                await self.connection.execute(new_sql)
+                await self.connection.execute(
+                    f"INSERT INTO {table}_new ({', '.join(columns)}) SELECT {select} FROM {table}"
+                )
+                await self.connection.execute(f"DROP TABLE {table}")
+                await self.connection.execute(f"ALTER TABLE {table}_new RENAME TO {table}")
+            except BaseException:
+                await self.connection.rollback()
+                raise
+            await self.connection.commit()
+            logger.info(f"Migrated {table} timestamps to epoch nanoseconds")
+    
     async def create_tables(self):
         """Create all necessary tables"""
-        tables = [
+        tables = {
             # Exams table
-            """
+            "exams": """
             CREATE TABLE IF NOT EXISTS exams (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 examId TEXT UNIQUE NOT NULL,
@@ -52,13 +206,13 @@ class SQLiteDatabase:
                 settings TEXT DEFAULT '{}',
                 studentsUploaded BOOLEAN DEFAULT FALSE,
                 solutionUploaded BOOLEAN DEFAULT FALSE,
-                createdAt TEXT NOT NULL,
+                createdAt INTEGER NOT NULL,
                 createdBy TEXT DEFAULT 'System'
             )
             """,
             
             # Students table
-            """
+            "students": """
             CREATE TABLE IF NOT EXISTS students (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 examId TEXT NOT NULL,
@@ -66,24 +220,24 @@ class SQLiteDatabase:
                 lockerNumber TEXT NOT NULL,
                 rank TEXT NOT NULL,
                 copyNumber TEXT NOT NULL,
-                createdAt TEXT NOT NULL,
+                createdAt INTEGER NOT NULL,
                 FOREIGN KEY (examId) REFERENCES exams (examId)
             )
             """,
             
             # Solutions table
-            """
+            "solutions": """
             CREATE TABLE IF NOT EXISTS solutions (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 examId TEXT NOT NULL,
                 solutions TEXT NOT NULL,
-                uploadedAt TEXT NOT NULL,
+                uploadedAt INTEGER NOT NULL,
                 FOREIGN KEY (examId) REFERENCES exams (examId)
             )
             """,
             
             # Results table
-            """
+            "results": """
             CREATE TABLE IF NOT EXISTS results (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 examId TEXT NOT NULL,
@@ -104,26 +258,26 @@ class SQLiteDatabase:
                 wing TEXT,
                 module TEXT,
                 studentInfo TEXT,
-                processedAt TEXT NOT NULL,
+                processedAt INTEGER NOT NULL,
                 FOREIGN KEY (examId) REFERENCES exams (examId)
             )
             """,
             
             # Reports table
-            """
+            "reports": """
             CREATE TABLE IF NOT EXISTS reports (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 examId TEXT NOT NULL,
                 reportType TEXT NOT NULL,
                 data TEXT NOT NULL,
                 generatedBy TEXT NOT NULL,
-                generatedAt TEXT NOT NULL,
+                generatedAt INTEGER NOT NULL,
                 FOREIGN KEY (examId) REFERENCES exams (examId)
             )
             """,
             
             # Responses table
-            """
+            "responses": """
             CREATE TABLE IF NOT EXISTS responses (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 examId TEXT NOT NULL,
@@ -136,194 +290,531 @@ class SQLiteDatabase:
                 blankAnswers INTEGER NOT NULL,
                 multipleMarks INTEGER NOT NULL,
                 processingMetadata TEXT NOT NULL,
-                processedAt TEXT NOT NULL,
+                processedAt INTEGER NOT NULL,
                 FOREIGN KEY (examId) REFERENCES exams (examId)
             )
             """
+        }
+        
+        indexes = [
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_results_exam_student ON results (examId, studentId)",
+            # Cover the examId filter and the sort used by the per-exam listings
+            "CREATE INDEX IF NOT EXISTS idx_results_exam_time ON results (examId, processedAt DESC)",
+            "CREATE INDEX IF NOT EXISTS idx_results_time ON results (processedAt DESC)",
+            # Covers the per-exam statistics aggregate so it never touches the table rows
+            "CREATE INDEX IF NOT EXISTS idx_results_exam_score ON results (examId, score)",
+            "CREATE INDEX IF NOT EXISTS idx_students_exam_copy ON students (examId, copyNumber ASC)",
+            # One answer key per exam, so it can be replaced with a single upsert;
+            # supersedes the plain examId index older databases were given
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_solutions_exam_key ON solutions (examId)",
+            "DROP INDEX IF EXISTS idx_solutions_exam",
+            "CREATE INDEX IF NOT EXISTS idx_responses_exam_student ON responses (examId, studentId)",
+            "CREATE INDEX IF NOT EXISTS idx_reports_exam ON reports (examId)",
+            # Lets get_all_exams walk the index instead of sorting
+            "CREATE INDEX IF NOT EXISTS idx_exams_time ON exams (createdAt DESC)",
         ]
         
-        for table_sql in tables:
+        for table_sql in tables.values():
             await self.connection.execute(table_sql)
         
+        await self.migrate_timestamps(tables)
+        
+        # Databases created before a unique index may hold several rows per key;
+        # keep only the latest before enforcing it
+        unique_index_dedupes = {
+            "idx_results_exam_student":
+                "DELETE FROM results WHERE id NOT IN (SELECT MAX(id) FROM results GROUP BY examId, studentId)",
+            "idx_solutions_exam_key":
+                "DELETE FROM solutions WHERE id NOT IN (SELECT MAX(id) FROM solutions GROUP BY examId)",
+        }
+        for index_name, dedupe_sql in unique_index_dedupes.items():
+            cursor = await self.connection.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (index_name,)
+            )
+            if await cursor.fetchone() is None:
+                await self.connection.execute(dedupe_sql)
+        
+        for index_sql in indexes:
+            await self.connection.execute(index_sql)
+        
         await self.connection.commit()
         logger.info("All tables created successfully")
 
+# SQL builders. Each statement shape is built once and then served from the
+# lru_cache, so callers hand sqlite3 identical text and hit its statement cache.
+# Names are interpolated into the SQL, so they must be plain identifiers.
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+def _check_identifiers(*names: str):
+    for name in names:
+        if not isinstance(name, str) or not _IDENTIFIER.match(name):
+            raise ValueError(f"Invalid SQL identifier: {name!r}")
+
+def _where(keys: Tuple[str, ...]) -> str:
+    """WHERE clause matching each key for equality, or an empty string"""
+    return f" WHERE {' AND '.join(f'{key} = ?' for key in keys)}" if keys else ""
+
+def _filter(filter_dict: Optional[Dict[str, Any]]) -> Tuple[Tuple[str, ...], List[Any]]:
+    """Filter keys in canonical (sorted) order and their values in the same order"""
+    if not filter_dict:
+        return (), []
+    keys = tuple(sorted(filter_dict))
+    return keys, [filter_dict[key] for key in keys]
+
+@lru_cache(maxsize=512)
+def _select_sql(table: str, filter_keys: Tuple[str, ...], columns: Optional[Tuple[str, ...]] = None,
+                sort_by: Optional[str] = None, sort_order: str = "ASC",
+                limit_placeholder: bool = False, skip_placeholder: bool = False) -> str:
+    _check_identifiers(table, *filter_keys, *(columns or ()), *((sort_by,) if sort_by else ()))
+    if sort_order.upper() not in ("ASC", "DESC"):
+        raise ValueError(f"Invalid sort order: {sort_order!r}")
+    query = f"SELECT {', '.join(columns) if columns else '*'} FROM {table}{_where(filter_keys)}"
+    if sort_by:
+        query += f" ORDER BY {sort_by} {sort_order.upper()}"
+    if limit_placeholder:
+        query += " LIMIT ?"
+        if skip_placeholder:
+            query += " OFFSET ?"
+    return query
+
+@lru_cache(maxsize=512)
+def _page_sql(table: str, filter_keys: Tuple[str, ...], sort_by: str, after_cursor: bool) -> str:
+    _check_identifiers(table, sort_by, *filter_keys)
+    conditions = [f"{key} = ?" for key in filter_keys]
+    if after_cursor:
+        conditions.append(f"({sort_by}, id) < (?, ?)")
+    query = f"SELECT * FROM {table}"
+    if conditions:
+        query += f" WHERE {' AND '.join(conditions)}"
+    return query + f" ORDER BY {sort_by} DESC, id DESC LIMIT ?"
+
+@lru_cache(maxsize=512)
+def _count_sql(table: str, filter_keys: Tuple[str, ...]) -> str:
+    _check_identifiers(table, *filter_keys)
+    return f"SELECT COUNT(*) FROM {table}{_where(filter_keys)}"
+
+@lru_cache(maxsize=512)
+def _aggregate_sql(table: str, expressions: Tuple[str, ...], filter_keys: Tuple[str, ...]) -> str:
+    _check_identifiers(table, *filter_keys)
+    return f"SELECT {', '.join(expressions)} FROM {table}{_where(filter_keys)}"
+
+@lru_cache(maxsize=512)
+def _exists_sql(table: str, filter_keys: Tuple[str, ...]) -> str:
+    _check_identifiers(table, *filter_keys)
+    return f"SELECT 1 FROM {table}{_where(filter_keys)} LIMIT 1"
+
+@lru_cache(maxsize=512)
+def _insert_sql(table: str, columns: Tuple[str, ...]) -> str:
+    _check_identifiers(table, *columns)
+    return f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['?' for _ in columns])})"
+
+@lru_cache(maxsize=512)
+def _upsert_sql(table: str, columns: Tuple[str, ...], conflict_columns: Tuple[str, ...]) -> str:
+    _check_identifiers(*conflict_columns)
+    updates = ', '.join(f"{key} = excluded.{key}" for key in columns if key not in conflict_columns)
+    action = f"DO UPDATE SET {updates}" if updates else "DO NOTHING"
+    return f"{_insert_sql(table, columns)} ON CONFLICT ({', '.join(conflict_columns)}) {action}"
+
+@lru_cache(maxsize=512)
+def _update_sql(table: str, set_keys: Tuple[str, ...], filter_keys: Tuple[str, ...]) -> str:
+    _check_identifiers(table, *set_keys, *filter_keys)
+    return f"UPDATE {table} SET {', '.join(f'{key} = ?' for key in set_keys)}{_where(filter_keys)}"
+
+@lru_cache(maxsize=512)
+def _update_returning_sql(table: str, set_keys: Tuple[str, ...], filter_keys: Tuple[str, ...]) -> str:
+    return f"{_update_sql(table, set_keys, filter_keys)} RETURNING *"
+
+@lru_cache(maxsize=512)
+def _delete_sql(table: str, filter_keys: Tuple[str, ...]) -> str:
+    _check_identifiers(table, *filter_keys)
+    return f"DELETE FROM {table}{_where(filter_keys)}"
+
 # Database helper functions for CRUD operations
 class DatabaseOperations:
     def __init__(self, db: SQLiteDatabase):
         self.db = db
+        self._write_lock = asyncio.Lock()
+        self._pending_writes: deque = deque()
+        self._writer: Optional[asyncio.Task] = None
+        self._schema = TABLE_SCHEMAS
+        # (table or tuple of tables, ...) -> (expiry, serialized response body or computed value)
+        self._result_cache: Dict[tuple, Tuple[float, Any]] = {}
+        self._cache_generation = 0
     
-    # Generic CRUD operations
-    async def insert_one(self, table: str, data: Dict[str, Any]) -> int:
-        """Insert a single record and return the row ID"""
-        # Convert complex objects to JSON strings
+    def pool_stats(self) -> Dict[str, Any]:
+        """Connection and queue figures for monitoring"""
+        return {
+            "readConnections": len(self.db.readers),
+            "pendingWrites": len(self._pending_writes),
+            "writerActive": self._writer is not None and not self._writer.done(),
+            "cachedResults": len(self._result_cache),
+            "cacheGeneration": self._cache_generation
+        }
+    
+    def cache_generation(self) -> int:
+        """Read before querying and hand to cache_result, so a write racing the query is noticed"""
+        return self._cache_generation
+    
+    def cached_result(self, key: tuple) -> Optional[Any]:
+        """Value cached under key, or None if absent or expired"""
+        entry = self._result_cache.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._result_cache[key]
+            return None
+        return entry[1]
+    
+    def cache_result(self, key: tuple, body: Any, generation: int):
+        """Cache body under key, whose first item is the table (or tuple of tables) it was read from"""
+        if generation == self._cache_generation:
+            self._result_cache[key] = (time.monotonic() + RESULT_CACHE_TTL, body)
+    
+    def _bust(self, table: Optional[str] = None):
+        """Drop cached results for table, or for every table"""
+        self._cache_generation += 1
+        if table is None:
+            self._result_cache.clear()
+            return
+        for key in [key for key in self._result_cache
+                    if key[0] == table or (isinstance(key[0], tuple) and table in key[0])]:
+            del self._result_cache[key]
+    
+    @asynccontextmanager
+    async def transaction(self):
+        """Run the enclosed writes in a single BEGIN IMMEDIATE/COMMIT transaction"""
+        if _in_transaction.get():
+            # Nested use joins the outer transaction
+            yield
+            return
+        
+        async with self._write_lock:
+            token = _in_transaction.set(True)
+            await self.db.connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                await self.db.connection.rollback()
+                raise
+            else:
+                await self.db.connection.commit()
+                # Readers could have cached the pre-transaction rows until now
+                self._bust()
+            finally:
+                _in_transaction.reset(token)
+    
+    async def _execute_write(self, query: str, values: Sequence[Any], fetch: bool = False):
+        """Run one write statement and return its cursor once committed.
+
+        Inside transaction() it runs directly; otherwise it is queued and committed
+        together with the other writes queued meanwhile, so they share one commit.
+        With fetch, the rows it returns (RETURNING) are read before the commit and
+        returned instead of the cursor.
+        """
+        if _in_transaction.get():
+            cursor = await self.db.connection.execute(query, values)
+            return await cursor.fetchall() if fetch else cursor
+        
+        future = asyncio.get_running_loop().create_future()
+        self._pending_writes.append((query, values, fetch, future))
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.create_task(self._writer_loop())
+        return await future
+    
+    async def _writer_loop(self):
+        """Drain the write queue, committing up to WRITE_BATCH_SIZE statements per transaction"""
+        connection = self.db.connection
+        while self._pending_writes:
+            # Let writers scheduled in the same tick join this batch; writes queued
+            # while a batch commits form the next one
+            await asyncio.sleep(0)
+            batch = [self._pending_writes.popleft() for _ in range(min(WRITE_BATCH_SIZE, len(self._pending_writes)))]
+            
+            async with self._write_lock:
+                executed = []
+                try:
+                    await connection.execute("BEGIN IMMEDIATE")
+                    for query, values, fetch, future in batch:
+                        if future.done():
+                            # The caller was cancelled before its write ran
+                            continue
+                        try:
+                            cursor = await connection.execute(query, values)
+                            result = await cursor.fetchall() if fetch else cursor
+                        except Exception as e:
+                            # A failed statement is undone on its own unless SQLite had to
+                            # roll back the whole transaction
+                            if not connection.in_transaction:
+                                raise
+                            future.set_exception(e)
+                        else:
+                            executed.append((future, result))
+                    await connection.commit()
+                except BaseException as e:
+                    if connection.in_transaction:
+                        await connection.rollback()
+                    for *_, future in batch:
+                        if future.done():
+                            continue
+                        if isinstance(e, Exception):
+                            future.set_exception(e)
+                        else:
+                            future.cancel()
+                    if not isinstance(e, Exception):
+                        raise
+                    continue
+            
+            for future, result in executed:
+                if not future.done():
+                    future.set_result(result)
+    
+    async def flush(self):
+        """Wait until every queued write has been committed"""
+        if self._writer is not None and not self._writer.done():
+            await self._writer
+    
+    def _read_connection(self) -> aiosqlite.Connection:
+        """Connection for a read; inside transaction() it must see the pending writes"""
+        if _in_transaction.get():
+            return self.db.connection
+        return self.db.reader()
+    
+    def _process_data(self, table: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert values SQLite cannot store, touching only the table's JSON and timestamp columns"""
+        schema = self._schema.get(table)
+        if schema is None:
+            return self._process_data_untyped(data)
+        json_cols = schema.get("json_cols", ())
+        return {
+            key: (
+                json_text(value) if key in json_cols
+                else datetime_to_ns(value) if key in TIMESTAMP_COLUMNS and isinstance(value, datetime)
+                else value
+            )
+            for key, value in data.items()
+        }
+    
+    def _process_data_untyped(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert complex objects by type, for tables without a TABLE_SCHEMAS entry"""
         processed_data = {}
         for key, value in data.items():
             if isinstance(value, (dict, list)):
-                processed_data[key] = json.dumps(value)
+                processed_data[key] = orjson.dumps(value, option=JSON_OPTIONS).decode()
             elif isinstance(value, datetime):
-                processed_data[key] = value.isoformat()
+                processed_data[key] = datetime_to_ns(value)
             else:
                 processed_data[key] = value
+        return processed_data
+    
+    # Generic CRUD operations
+    async def insert_one(self, table: str, data: Dict[str, Any]) -> int:
+        """Insert a single record and return the row ID"""
+        processed_data = self._process_data(table, data)
+        query = _insert_sql(table, tuple(processed_data))
         
-        columns = ', '.join(processed_data.keys())
-        placeholders = ', '.join(['?' for _ in processed_data])
-        values = list(processed_data.values())
-        
-        query = f"INSERT INTO {table} ({columns}) VALUES ({placeholders})"
-        
-        cursor = await self.db.connection.execute(query, values)
-        await self.db.connection.commit()
+        cursor = await self._execute_write(query, list(processed_data.values()))
+        self._bust(table)
         return cursor.lastrowid
     
-    async def find_one(self, table: str, filter_dict: Dict[str, Any] = None) -> Optional[Dict[str, Any]]:
-        """Find a single record"""
-        query = f"SELECT * FROM {table}"
-        values = []
+    @staticmethod
+    def _group_by_columns(rows: List[Dict[str, Any]]) -> Dict[tuple, List[Dict[str, Any]]]:
+        """Group rows by their column signature so each group shares one statement"""
+        groups: Dict[tuple, List[Dict[str, Any]]] = {}
+        for row in rows:
+            groups.setdefault(tuple(row.keys()), []).append(row)
+        return groups
+    
+    async def insert_many(self, table: str, rows: List[Dict[str, Any]]) -> int:
+        """Insert many records in one transaction, one executemany per distinct column set"""
+        if not rows:
+            return 0
+        
+        async with self.transaction():
+            for columns, group in self._group_by_columns(rows).items():
+                # Rows are encoded lazily as sqlite3 consumes the generator
+                values = (tuple(self._process_data(table, row).values()) for row in group)
+                await self.db.connection.executemany(_insert_sql(table, columns), values)
+        return len(rows)
+    
+    async def upsert(self, table: str, conflict_columns: Sequence[str], data: Dict[str, Any]) -> int:
+        """Insert a record, or update the one matching conflict_columns, in a single statement"""
+        processed_data = self._process_data(table, data)
+        query = _upsert_sql(table, tuple(processed_data), tuple(conflict_columns))
         
-        if filter_dict:
-            conditions = []
-            for key, value in filter_dict.items():
-                conditions.append(f"{key} = ?")
-                values.append(value)
-            query += f" WHERE {' AND '.join(conditions)}"
+        cursor = await self._execute_write(query, list(processed_data.values()))
+        self._bust(table)
+        return cursor.rowcount
+    
+    async def upsert_one(self, table: str, filter_dict: Dict[str, Any], data: Dict[str, Any]) -> int:
+        """Update the record matching filter_dict or insert it; filter_dict must cover a unique index"""
+        return await self.upsert(table, tuple(filter_dict), {**data, **filter_dict})
+    
+    async def upsert_many(self, table: str, conflict_columns: Sequence[str], rows: List[Dict[str, Any]]) -> int:
+        """Upsert many records in one transaction, one executemany per distinct column set"""
+        if not rows:
+            return 0
         
-        query += " LIMIT 1"
+        async with self.transaction():
+            for columns, group in self._group_by_columns(rows).items():
+                query = _upsert_sql(table, columns, tuple(conflict_columns))
+                values = (tuple(self._process_data(table, row).values()) for row in group)
+                await self.db.connection.executemany(query, values)
+        return len(rows)
+    
+    async def find_one(self, table: str, filter_dict: Dict[str, Any] = None,
+                       columns: Optional[Sequence[str]] = None) -> Optional[Dict[str, Any]]:
+        """Find a single record, optionally fetching only the given columns"""
+        keys, values = _filter(filter_dict)
+        query = _select_sql(table, keys, tuple(columns) if columns else None, limit_placeholder=True)
+        values.append(1)
         
-        cursor = await self.db.connection.execute(query, values)
-        row = await cursor.fetchone()
+        # Close the cursor promptly so the reader does not pin an old WAL snapshot
+        async with self._read_connection().execute(query, values) as cursor:
+            row = await cursor.fetchone()
         
         if row:
-            columns = [description[0] for description in cursor.description]
-            result = dict(zip(columns, row))
-            return self._process_result(result)
+            return self._process_row(table, row)
         return None
     
     async def find_many(self, table: str, filter_dict: Dict[str, Any] = None, 
                        sort_by: str = None, sort_order: str = "ASC", 
-                       limit: int = None, skip: int = None) -> List[Dict[str, Any]]:
-        """Find multiple records"""
-        query = f"SELECT * FROM {table}"
-        values = []
-        
-        if filter_dict:
-            conditions = []
-            for key, value in filter_dict.items():
-                conditions.append(f"{key} = ?")
-                values.append(value)
-            query += f" WHERE {' AND '.join(conditions)}"
-        
-        if sort_by:
-            query += f" ORDER BY {sort_by} {sort_order}"
+                       limit: int = None, skip: int = None,
+                       columns: Optional[Sequence[str]] = None, raw_json: bool = False) -> List[Dict[str, Any]]:
+        """Find multiple records, optionally fetching only the given columns.
+
+        raw_json leaves JSON columns as orjson.Fragment; only pass the result to orjson.
+        """
+        keys, values = _filter(filter_dict)
         
+        # Bind paging values so every page reuses the same prepared statement
         if limit:
-            query += f" LIMIT {limit}"
+            values.append(limit)
             if skip:
-                query += f" OFFSET {skip}"
+                values.append(skip)
         
-        cursor = await self.db.connection.execute(query, values)
-        rows = await cursor.fetchall()
+        query = _select_sql(table, keys, tuple(columns) if columns else None, sort_by, sort_order,
+                            bool(limit), bool(limit and skip))
         
-        if rows:
-            columns = [description[0] for description in cursor.description]
-            results = [dict(zip(columns, row)) for row in rows]
-            return [self._process_result(result) for result in results]
-        return []
-    
-    async def update_one(self, table: str, filter_dict: Dict[str, Any], 
-                        update_data: Dict[str, Any]) -> int:
-        """Update a single record and return the number of affected rows"""
-        # Process update data
-        processed_data = {}
-        for key, value in update_data.items():
-            if isinstance(value, (dict, list)):
-                processed_data[key] = json.dumps(value)
-            elif isinstance(value, datetime):
-                processed_data[key] = value.isoformat()
-            else:
-                processed_data[key] = value
+        async with self._read_connection().execute(query, values) as cursor:
+            rows = await cursor.fetchall()
         
-        set_clauses = []
-        values = []
+        return [self._process_row(table, row, raw_json) for row in rows]
+    
+    async def find_page(self, table: str, filter_dict: Dict[str, Any] = None, sort_by: str = "id",
+                        limit: int = 200, cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Fetch a page of records newest first by (sort_by, id) and the cursor for the next page, or None.
+
+        The cursor is an opaque string: nanosecond timestamps exceed the 2**53 integers
+        a JavaScript number holds exactly, so they must not cross the bridge as numbers.
+        """
+        keys, values = _filter(filter_dict)
         
-        for key, value in processed_data.items():
-            set_clauses.append(f"{key} = ?")
-            values.append(value)
+        # Keyset pagination: resume strictly after the last row of the previous page
+        if cursor:
+            values.extend(orjson.loads(cursor))
+        values.append(limit)
+        query = _page_sql(table, keys, sort_by, bool(cursor))
         
-        conditions = []
-        for key, value in filter_dict.items():
-            conditions.append(f"{key} = ?")
-            values.append(value)
+        async with self._read_connection().execute(query, values) as db_cursor:
+            rows = await db_cursor.fetchall()
         
-        query = f"UPDATE {table} SET {', '.join(set_clauses)} WHERE {' AND '.join(conditions)}"
+        next_cursor = None
+        if len(rows) == limit:
+            next_cursor = orjson.dumps([rows[-1][sort_by], rows[-1]["id"]]).decode()
+        return [self._process_row(table, row) for row in rows], next_cursor
+    
+    async def update_one(self, table: str, filter_dict: Dict[str, Any], 
+                        update_data: Dict[str, Any]) -> int:
+        """Update a single record and return the number of affected rows"""
+        processed_data = self._process_data(table, update_data)
+        keys, filter_values = _filter(filter_dict)
+        query = _update_sql(table, tuple(processed_data), keys)
         
-        cursor = await self.db.connection.execute(query, values)
-        await self.db.connection.commit()
+        cursor = await self._execute_write(query, [*processed_data.values(), *filter_values])
+        self._bust(table)
         return cursor.rowcount
     
+    async def update_one_returning(self, table: str, filter_dict: Dict[str, Any],
+                                   update_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Update a single record and return it as updated, or None if nothing matched"""
+        processed_data = self._process_data(table, update_data)
+        keys, filter_values = _filter(filter_dict)
+        query = _update_returning_sql(table, tuple(processed_data), keys)
+        
+        rows = await self._execute_write(query, [*processed_data.values(), *filter_values], fetch=True)
+        self._bust(table)
+        if rows:
+            return self._process_row(table, rows[0])
+        return None
+    
     async def delete_one(self, table: str, filter_dict: Dict[str, Any]) -> int:
         """Delete a single record and return the number of affected rows"""
-        conditions = []
-        values = []
-        
-        for key, value in filter_dict.items():
-            conditions.append(f"{key} = ?")
-            values.append(value)
-        
-        query = f"DELETE FROM {table} WHERE {' AND '.join(conditions)}"
-        
-        cursor = await self.db.connection.execute(query, values)
-        await self.db.connection.commit()
-        return cursor.rowcount
+        return await self.delete_many(table, filter_dict)
     
     async def delete_many(self, table: str, filter_dict: Dict[str, Any]) -> int:
         """Delete multiple records and return the number of affected rows"""
-        conditions = []
-        values = []
-        
-        for key, value in filter_dict.items():
-            conditions.append(f"{key} = ?")
-            values.append(value)
+        keys, values = _filter(filter_dict)
         
-        query = f"DELETE FROM {table} WHERE {' AND '.join(conditions)}"
-        
-        cursor = await self.db.connection.execute(query, values)
-        await self.db.connection.commit()
+        cursor = await self._execute_write(_delete_sql(table, keys), values)
+        self._bust(table)
         return cursor.rowcount
     
     async def count_documents(self, table: str, filter_dict: Dict[str, Any] = None) -> int:
         """Count documents in a table"""
-        query = f"SELECT COUNT(*) FROM {table}"
-        values = []
-        
-        if filter_dict:
-            conditions = []
-            for key, value in filter_dict.items():
-                conditions.append(f"{key} = ?")
-                values.append(value)
-            query += f" WHERE {' AND '.join(conditions)}"
+        keys, values = _filter(filter_dict)
         
-        cursor = await self.db.connection.execute(query, values)
-        result = await cursor.fetchone()
+        async with self._read_connection().execute(_count_sql(table, keys), values) as cursor:
+            result = await cursor.fetchone()
         return result[0] if result else 0
     
-    def _process_result(self, result: Dict[str, Any]) -> Dict[str, Any]:
-        """Process result to convert JSON strings back to objects and add _id field"""
-        processed = {}
+    async def aggregate(self, table: str, expressions: Sequence[str], filter_dict: Dict[str, Any] = None,
+                        params: Sequence[Any] = ()) -> Dict[str, Any]:
+        """Evaluate aggregate expressions over the matching records in one query.
+
+        Expressions are trusted SQL such as "AVG(score) AS averageScore"; params
+        fill their placeholders and are bound ahead of the filter values.
+        """
+        keys, values = _filter(filter_dict)
+        query = _aggregate_sql(table, tuple(expressions), keys)
+        
+        async with self._read_connection().execute(query, [*params, *values]) as cursor:
+            row = await cursor.fetchone()
+        return dict(zip(row.keys(), row))
+    
+    async def exists(self, table: str, filter_dict: Dict[str, Any] = None) -> bool:
+        """Whether any record matches, stopping at the first one instead of counting"""
+        keys, values = _filter(filter_dict)
         
-        for key, value in result.items():
-            if key == 'id':
-                processed['_id'] = str(value)  # Convert to string to match MongoDB format
-                processed[key] = value
-            elif key in ['settings', 'solutions', 'responses', 'studentInfo', 'processingMetadata', 'data']:
+        async with self._read_connection().execute(_exists_sql(table, keys), values) as cursor:
+            row = await cursor.fetchone()
+        return row is not None
+    
+    def _process_row(self, table: str, row: sqlite3.Row, raw_json: bool = False) -> Dict[str, Any]:
+        """Turn a row into a dict with an _id field, converting only the table's known columns.
+
+        With raw_json, JSON columns are wrapped as orjson.Fragment so an orjson
+        response can embed the stored text without parsing it first.
+        """
+        result = dict(zip(row.keys(), row))
+        processed = {"_id": str(result["id"]), **result} if "id" in result else result
+        schema = self._schema.get(table, {})
+        
+        for key in schema.get("json_cols", ()):
+            if key in processed:
+                value = processed[key]
+                if raw_json:
+                    processed[key] = orjson.Fragment(value) if value else EMPTY_JSON
+                    continue
                 try:
-                    processed[key] = json.loads(value) if value else {}
-                except (json.JSONDecodeError, TypeError):
-                    processed[key] = value
-            elif key in ['studentsUploaded', 'solutionUploaded']:
-                processed[key] = bool(value)
-            else:
-                processed[key] = value
+                    processed[key] = orjson.loads(value) if value else {}
+                except (orjson.JSONDecodeError, TypeError):
+                    pass
+        for key in schema.get("bool_cols", ()):
+            if key in processed:
+                processed[key] = bool(processed[key])
+        for key in TIMESTAMP_COLUMNS:
+            if isinstance(processed.get(key), int):
+                processed[key] = ns_to_isoformat(processed[key])
         
         return processed
 
@@ -1,17 +1,17 @@
 from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse, FileResponse
+from fastapi.responses import StreamingResponse, FileResponse, ORJSONResponse
 import uvicorn
 import os
 from contextlib import asynccontextmanager
-from datetime import datetime
-from database import database, db_operations
+from database import database, db_operations, utc_timestamp
 
 # Import routers from the correct 'routes' directory
 from routers import exams, scan, results, reports, settings, students, omr, solutions
 
 # Database path
 DATABASE_PATH = os.getenv("DATABASE_PATH", "omr_database.db")
+DEV = os.getenv("DEV") == "1"
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -20,7 +20,7 @@ async def lifespan(app: FastAPI):
         # Initialize SQLite database
         database.db_path = DATABASE_PATH
         await database.connect()
-        print(f"MongoDB connected successfully at {datetime.utcnow().isoformat()}")
+        print(f"MongoDB connected successfully at {utc_timestamp()}")
     except Exception as e:
         print(f"SQLite database connection failed: {e}")
         raise
@@ -28,14 +28,16 @@ async def lifespan(app: FastAPI):
     app.state.database = database
     app.state.db_operations = db_operations
     yield
+    await db_operations.flush()
     await database.disconnect()
-    print(f"SQLite database connection closed at {datetime.utcnow().isoformat()}")
+    print(f"SQLite database connection closed at {utc_timestamp()}")
 
 app = FastAPI(
     title="OMR Processing API",
     description="Backend API for OMR (Optical Mark Recognition) processing system",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware
@@ -43,8 +45,9 @@ app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:5173", "file://", "app://"],  # Allow Electron origins
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+    allow_headers=["Content-Type", "Authorization", "X-Requested-With"],
+    max_age=86400,  # Let clients cache the preflight for a day
 )
 
 # Include routers
@@ -62,19 +65,26 @@ app.include_router(solutions.router, prefix="/api/solutions", tags=["solutions"]
 async def health_check():
     return {
         "status": "OK",
-        "timestamp": datetime.utcnow().isoformat()  # Updated to current UTC time
+        "timestamp": utc_timestamp()
     }
 
+# Database pool and write-queue figures for monitoring; internal state, so dev builds only
+if DEV:
+    @app.get("/api/debug/pool")
+    async def pool_stats():
+        return db_operations.pool_stats()
+
 # Error handling
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     print(f"Server error: {exc}")
-    return HTTPException(
+    # Return the response directly; an HTTPException here would go back through the encoder
+    return ORJSONResponse(
         status_code=500,
-        detail={
+        content={
             "error": "Internal server error",
             "message": str(exc),
-            "timestamp": datetime.utcnow().isoformat()  # Add timestamp for debugging
+            "timestamp": utc_timestamp()  # Add timestamp for debugging
         }
     )
 
@@ -83,5 +93,12 @@ if __name__ == "__main__":
         "main:app",
         host="0.0.0.0",
         port=int(os.getenv("PORT", 3001)),
-        reload=True
+        reload=DEV,
+        # uvloop/httptools when installed (uvloop is unavailable on Windows), else asyncio/h11
+        loop="auto",
+        http="auto",
+        # Always one worker: the result cache, its write-driven invalidation and the
+        # write queue live in this process, so a second worker would serve stale data
+        workers=1,
+        log_level="info" if DEV else "warning"
     )
\ No newline at end of file
@@ -0,0 +1,17 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Tuple
+
+# Bubble labels shared by every question on a sheet
+OPTIONS = ("A", "B", "C", "D", "E")
+
+@dataclass(frozen=True, slots=True)
+class McqQuestion:
+    """One question of a sheet's mcqSection; frozen because the cached list is shared"""
+    number: int
+    options: Tuple[str, ...] = OPTIONS
+
+@lru_cache(maxsize=32)
+def mcq_questions(num_questions: int) -> Tuple[McqQuestion, ...]:
+    """Question list for an exam's mcqSection, built once and shared by every sheet"""
+    return tuple(McqQuestion(n) for n in range(1, num_questions + 1))
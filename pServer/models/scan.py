@@ -679,4 +679,15 @@ def process_omr_image(image_data: bytes, answer_key: List[str], num_questions: i
         
     except Exception as e:
         logger.error(f"Error processing OMR image: {str(e)}")
-        raise ValueError(f"Failed to process OMR image: {str(e)}")
\ No newline at end of file
+        raise ValueError(f"Failed to process OMR image: {str(e)}")
+
+
+def warm_up() -> None:
+    """Run a small synthetic sheet through decoding, preprocessing and bubble detection
+    so OpenCV and NumPy finish their lazy setup before the first real scan."""
+    img = np.full((200, 200, 3), 255, np.uint8)
+    cv2.circle(img, (100, 100), 10, (0, 0, 0), -1)
+    _, encoded = cv2.imencode(".png", img)
+    decoded = cv2.imdecode(np.frombuffer(encoded.tobytes(), np.uint8), cv2.IMREAD_COLOR)
+    gray, thresh, _ = preprocess_scanned_image(decoded)
+    detect_bubbles_scanned(thresh, gray)
@@ -1,12 +1,17 @@
-from pydantic import BaseModel, Field
-from typing import List
-from datetime import datetime
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Literal
+import time
 
 class SolutionItem(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True, frozen=True)
+
     question: int
-    answer: str = Field(..., pattern="^[A-E]$")
+    answer: Literal['A', 'B', 'C', 'D', 'E']
 
 class Solution(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True, frozen=True)
+
     examId: str
     solutions: List[SolutionItem]
-    uploadedAt: datetime = Field(default_factory=datetime.now)
\ No newline at end of file
+    # Epoch nanoseconds, the unit the timestamp columns are stored in
+    uploadedAt: int = Field(default_factory=time.time_ns)
@@ -1,14 +1,16 @@
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import Response
 from typing import List
+import orjson
 from models.exam import ExamCreate, ExamUpdate, ExamResponse
-from datetime import datetime
+import time
 import uuid
+from database import db_operations
 
 router = APIRouter()
 
-def get_database():
-    from main import app
-    return app.state.db_operations
+async def get_database():
+    return db_operations
 
 @router.post("/", response_model=dict)
 async def create_exam(exam: ExamCreate, db_ops=Depends(get_database)):
@@ -18,8 +20,8 @@ async def create_exam(exam: ExamCreate, db_ops=Depends(get_database)):
             exam.examId = str(uuid.uuid4())
         
         # Prepare exam data
-        exam_data = exam.dict()
-        exam_data['createdAt'] = exam_data.get('createdAt') or datetime.utcnow()
+        exam_data = exam.model_dump()
+        exam_data['createdAt'] = exam_data.get('createdAt') or time.time_ns()
         
         # Insert into database
         result = await db_ops.insert_one('exams', exam_data)
@@ -34,20 +36,32 @@ async def create_exam(exam: ExamCreate, db_ops=Depends(get_database)):
 @router.get("/", response_model=List[dict])
 async def get_all_exams(db_ops=Depends(get_database)):
     try:
-        exams = await db_ops.find_many('exams', sort_by="createdAt", sort_order="DESC")
+        # Serve repeated polling from the cached body until an exam is written
+        body = db_ops.cached_result(('exams', 'all'))
+        if body is None:
+            generation = db_ops.cache_generation()
+            # settings stays as its stored JSON text; orjson embeds it without a parse/re-serialize
+            exams = await db_ops.find_many('exams', sort_by="createdAt", sort_order="DESC", raw_json=True)
+            body = orjson.dumps(exams)
+            db_ops.cache_result(('exams', 'all'), body, generation)
         
-        return exams
+        return Response(content=body, media_type="application/json")
     except Exception as e:
         raise HTTPException(status_code=500, detail="Failed to fetch exams")
 
 @router.get("/{exam_id}", response_model=dict)
 async def get_exam(exam_id: str, db_ops=Depends(get_database)):
     try:
-        exam = await db_ops.find_one('exams', {"examId": exam_id})
-        if not exam:
-            raise HTTPException(status_code=404, detail="Exam not found")
+        body = db_ops.cached_result(('exams', exam_id))
+        if body is None:
+            generation = db_ops.cache_generation()
+            exam = await db_ops.find_one('exams', {"examId": exam_id})
+            if not exam:
+                raise HTTPException(status_code=404, detail="Exam not found")
+            body = orjson.dumps(exam)
+            db_ops.cache_result(('exams', exam_id), body, generation)
         
-        return exam
+        return Response(content=body, media_type="application/json")
     except HTTPException:
         raise
     except Exception as e:
@@ -56,15 +70,14 @@ async def get_exam(exam_id: str, db_ops=Depends(get_database)):
 @router.put("/{exam_id}", response_model=dict)
 async def update_exam(exam_id: str, exam_update: ExamUpdate, db_ops=Depends(get_database)):
     try:
-        update_data = {k: v for k, v in exam_update.dict().items() if v is not None}
+        update_data = exam_update.model_dump(exclude_none=True)
         
-        result = await db_ops.update_one('exams', {"examId": exam_id}, update_data)
+        # RETURNING hands back the updated row, so no second query is needed
+        updated_exam = await db_ops.update_one_returning('exams', {"examId": exam_id}, update_data)
         
-        if result == 0:
+        if updated_exam is None:
             raise HTTPException(status_code=404, detail="Exam not found")
         
-        updated_exam = await db_ops.find_one('exams', {"examId": exam_id})
-        
         return updated_exam
     except HTTPException:
         raise
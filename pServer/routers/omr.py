@@ -5,6 +5,8 @@ import zipfile
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import A4
 import logging
+from database import db_operations
+from models.omr_sheet import OPTIONS, mcq_questions
 
 router = APIRouter()
 
@@ -12,9 +14,8 @@ router = APIRouter()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def get_database():
-    from main import app
-    return app.state.db_operations
+async def get_database():
+    return db_operations
 
 @router.get("/{exam_id}/sheets")
 async def generate_omr_sheets(exam_id: str, db_ops=Depends(get_database)):
@@ -133,13 +134,7 @@ def generate_omr_sheet(exam, student):
                     "instructions": exam.get("instructions", "Fill bubbles neatly with a black/blue pen, mark only one option per question—any extra, unclear, or incorrect marking will be considered wrong.")
                 },
                 "mcqSection": {
-                    "questions": [
-                        {
-                            "number": i + 1,
-                            "options": ["A", "B", "C", "D", "E"]
-                        }
-                        for i in range(exam["numQuestions"])
-                    ]
+                    "questions": mcq_questions(exam["numQuestions"])
                 },
                 "footer": {
                     "studentSignature": "",
@@ -354,7 +349,7 @@ def generate_omr_pdf(exam, student):
                         bubble_x = option_start_x + j * (bubble_size + bubble_spacing)
                         p.circle(bubble_x + bubble_size/2, question_y + bubble_size/2, bubble_size/2, fill=0)
                         p.setFont("Helvetica", 6)
-                        p.drawCentredString(bubble_x + bubble_size/2, question_y + bubble_size/2 - 2, ["A", "B", "C", "D", "E"][j])
+                        p.drawCentredString(bubble_x + bubble_size/2, question_y + bubble_size/2 - 2, OPTIONS[j])
 
 
         # Footer
@@ -7,12 +7,12 @@ from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
 from models.report import ReportCreate, ReportResponse
 from datetime import datetime
+from database import database
 
 router = APIRouter()
 
-def get_database():
-    from main import app
-    return app.state.database
+async def get_database():
+    return database
 
 @router.post("/excel/{exam_id}")
 async def generate_excel_report(exam_id: str, db=Depends(get_database)):
@@ -95,7 +95,7 @@ async def generate_excel_report(exam_id: str, db=Depends(get_database)):
         await db.reports.insert_one(report_data)
 
         return StreamingResponse(
-            io.BytesIO(buffer.read()),
+            buffer,
             media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
             headers={"Content-Disposition": f"attachment; filename={exam['name']}_Report.xlsx"}
         )
@@ -203,7 +203,7 @@ async def generate_pdf_report(exam_id: str, db=Depends(get_database)):
         await db.reports.insert_one(report_data)
 
         return StreamingResponse(
-            io.BytesIO(buffer.read()),
+            buffer,
             media_type="application/pdf",
             headers={"Content-Disposition": f"attachment; filename={exam['name']}_Report.pdf"}
         )
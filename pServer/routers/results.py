@@ -1,42 +1,45 @@
 from fastapi import APIRouter, HTTPException, Depends, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse
 from typing import List, Optional
 import io
+import tempfile
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
 from openpyxl import Workbook
 from models.result import ResultCreate, ResultResponse
 from datetime import datetime
+import time
+from database import db_operations
 
 router = APIRouter()
 
-def get_database():
-    from main import app
-    return app.state.db_operations
+# Largest page any results listing will return, whatever the client asks for
+MAX_PAGE_LIMIT = 500
+
+# Columns of the results table a listing may be sorted by
+RESULT_SORT_COLUMNS = frozenset((
+    'id', 'examId', 'studentId', 'studentName', 'examName', 'score', 'totalMarks',
+    'percentage', 'passFailStatus', 'correctAnswers', 'incorrectAnswers', 'blankAnswers',
+    'multipleMarks', 'sponsorDS', 'course', 'wing', 'module', 'processedAt'
+))
+
+async def get_database():
+    return db_operations
 
 @router.post("/save")
 async def save_result(result: ResultCreate, db_ops=Depends(get_database)):
     try:
         # Validate input data
-        result_data = result.dict()
-        result_data["processedAt"] = datetime.utcnow()
-
-        # Check if result already exists
-        existing_result = await db_ops.find_one('results', {
-            "examId": result.examId,
-            "studentId": result.studentId
-        })
-
-        if existing_result:
-            # Update existing result
-            await db_ops.update_one(
-                'results',
-                {"examId": result.examId, "studentId": result.studentId},
-                result_data
-            )
-        else:
-            # Create new result
-            await db_ops.insert_one('results', result_data)
+        result_data = result.model_dump()
+        result_data["processedAt"] = time.time_ns()
+
+        # Insert or replace the student's result in one statement
+        await db_ops.upsert_one(
+            'results',
+            {"examId": result.examId, "studentId": result.studentId},
+            result_data
+        )
 
         return {"message": "Result saved successfully"}
     except ValueError as ve:
@@ -45,9 +48,20 @@ async def save_result(result: ResultCreate, db_ops=Depends(get_database)):
         raise HTTPException(status_code=500, detail=f"Failed to save result: {str(e)}")
 
 @router.get("/all", response_model=List[dict])
-async def get_all_results(db_ops=Depends(get_database)):
+async def get_all_results(page: int = 1, limit: Optional[int] = None, db_ops=Depends(get_database)):
     try:
-        results = await db_ops.find_many('results', sort_by="processedAt", sort_order="DESC")
+        # Without a limit, keep returning every result as existing callers expect
+        if limit is None:
+            return await db_ops.find_many('results', sort_by="processedAt", sort_order="DESC")
+
+        limit = max(1, min(limit, MAX_PAGE_LIMIT))
+        results = await db_ops.find_many(
+            'results',
+            sort_by="processedAt",
+            sort_order="DESC",
+            limit=limit,
+            skip=(max(page, 1) - 1) * limit
+        )
         
         return results
     except Exception as e:
@@ -60,8 +74,9 @@ async def publish_results(request_data: dict, db_ops=Depends(get_database)):
         exam_name = request_data.get("examName")
         results = request_data.get("results", [])
 
-        for result in results:
-            result_data = {
+        processed_at = time.time_ns()
+        rows = [
+            {
                 "examId": exam_id,
                 "examName": exam_name,
                 "studentId": result.get("studentId"),
@@ -80,130 +95,151 @@ async def publish_results(request_data: dict, db_ops=Depends(get_database)):
                 "wing": result.get("wing"),
                 "module": result.get("module"),
                 "studentInfo": result.get("studentInfo"),
-                "processedAt": datetime.utcnow()
+                "processedAt": processed_at
             }
+            for result in results
+        ]
 
-            existing_result = await db_ops.find_one('results', {
-                "examId": exam_id,
-                "studentId": result.get("studentId")
-            })
-
-            if existing_result:
-                await db_ops.update_one(
-                    'results',
-                    {"examId": exam_id, "studentId": result.get("studentId")},
-                    result_data
-                )
-            else:
-                await db_ops.insert_one('results', result_data)
+        # One INSERT ... ON CONFLICT executemany in one transaction, keyed on the
+        # unique (examId, studentId) index, instead of a lookup plus a write per result
+        await db_ops.upsert_many('results', ('examId', 'studentId'), rows)
 
         return {"message": f"Successfully published {len(results)} results"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to publish results: {str(e)}")
 
+# Results PDF table layout as (header, x-coordinate); the pass/fail column comes last
+RESULTS_PDF_COLUMNS = (
+    ("Student Name", 50),
+    ("ID", 150),
+    ("Locker", 230),
+    ("Rank", 280),
+    ("Exam", 340),
+    ("Score", 420),
+    ("%", 470),
+    ("Result", 500),
+)
+RESULTS_PDF_CELL_XS = tuple(x for _, x in RESULTS_PDF_COLUMNS[:-1])
+RESULTS_PDF_STATUS_X = RESULTS_PDF_COLUMNS[-1][1]
+
+def _draw_results_pdf_headers(p, y_pos):
+    p.setFont("Helvetica", 7)  # Reduced font size for headers
+    for label, x in RESULTS_PDF_COLUMNS:
+        p.drawString(x, y_pos, label)
+
+def _build_results_pdf(results: List[dict]) -> io.BytesIO:
+    """Render the results report; blocking reportlab work, so run it off the event loop"""
+    # Create PDF
+    buffer = io.BytesIO()
+    p = canvas.Canvas(buffer, pagesize=letter)
+    width, height = letter
+
+    # Title
+    p.setFont("Helvetica-Bold", 20)
+    p.drawCentredString(width/2, height-50, "OMR Results Report")
+    p.setFont("Helvetica", 14)
+    p.drawCentredString(width/2, height-80, f"Generated: {datetime.now().strftime('%Y-%m-%d')}")
+
+    # Statistics
+    total_students = len(results)
+    passed_students = 0
+    total_percentage = 0
+    for r in results:
+        passed_students += r.get('passFailStatus') == 'Pass'
+        total_percentage += r.get('percentage', 0)
+    failed_students = total_students - passed_students
+    avg_percentage = total_percentage / total_students if total_students > 0 else 0
+
+    y_pos = height - 150
+    p.setFont("Helvetica-Bold", 14)
+    p.drawString(50, y_pos, "Summary Statistics")
+    p.setFont("Helvetica", 12)
+    y_pos -= 20
+    p.drawString(50, y_pos, f"Total Students: {total_students}")
+    y_pos -= 15
+    p.drawString(50, y_pos, f"Passed: {passed_students} ({(passed_students/total_students*100):.1f}%)")
+    y_pos -= 15
+    p.drawString(50, y_pos, f"Failed: {failed_students} ({(failed_students/total_students*100):.1f}%)")
+    y_pos -= 15
+    p.drawString(50, y_pos, f"Average Score: {avg_percentage:.1f}%")
+
+    # Results table
+    y_pos -= 40
+    p.setFont("Helvetica-Bold", 14)
+    p.drawString(50, y_pos, "Individual Results")
+    
+    # Table headers
+    y_pos -= 30
+    _draw_results_pdf_headers(p, y_pos)
+
+    # Pass/fail cells are collected per colour and written after the page's
+    # rows, so the fill colour changes once per group instead of twice per row
+    status_colors = {"Pass": (0, 0.5, 0), "Fail": (1, 0, 0)}  # Green, red
+    statuses = {color: [] for color in status_colors.values()}
+
+    def finish_page(text):
+        for color, cells in statuses.items():
+            if cells:
+                text.setFillColorRGB(*color)
+                for y, value in cells:
+                    text.setTextOrigin(RESULTS_PDF_STATUS_X, y)
+                    text.textOut(value)
+                cells.clear()
+        p.drawText(text)
+
+    # Table rows, written through one text object per page
+    y_pos -= 20
+    text = p.beginText()
+    text.setFont("Helvetica", 6)  # Reduced font size for rows
+    for result in results[:40]:  # Limit to 40 results per page
+        if y_pos < 100:  # Start new page if needed
+            finish_page(text)
+            p.showPage()
+            y_pos = height - 50
+            # Redraw headers on new page
+            _draw_results_pdf_headers(p, y_pos)
+            y_pos -= 20
+            text = p.beginText()
+            text.setFont("Helvetica", 6)
+
+        # Remove truncation to allow full text
+        get = result.get
+        info_get = (get('studentInfo') or {}).get
+        cells = (
+            str(get('studentName', '')),
+            str(get('studentId', '')),
+            str(info_get('lockerNumber', '')),
+            str(info_get('rank', '')),
+            str(get('examName', '')),
+            f"{get('score', 0)}/{get('totalMarks', 0)}",
+            f"{get('percentage', 0):.1f}%"
+        )
+        for x, value in zip(RESULTS_PDF_CELL_XS, cells):
+            text.setTextOrigin(x, y_pos)
+            text.textOut(value)
+        
+        # Color code the result
+        status = get('passFailStatus', '')
+        color = status_colors["Pass" if status == 'Pass' else "Fail"]
+        statuses[color].append((y_pos, str(status)))
+        
+        y_pos -= 15
+
+    finish_page(text)
+    p.save()
+    buffer.seek(0)
+    return buffer
+
 @router.post("/download-all-pdf")
 async def download_all_pdf(request_data: dict):
     try:
         results = request_data.get("results", [])
         filters = request_data.get("filters", {})
 
-        # Create PDF
-        buffer = io.BytesIO()
-        p = canvas.Canvas(buffer, pagesize=letter)
-        width, height = letter
-
-        # Title
-        p.setFont("Helvetica-Bold", 20)
-        p.drawCentredString(width/2, height-50, "OMR Results Report")
-        p.setFont("Helvetica", 14)
-        p.drawCentredString(width/2, height-80, f"Generated: {datetime.now().strftime('%Y-%m-%d')}")
-
-        # Statistics
-        total_students = len(results)
-        passed_students = len([r for r in results if r.get('passFailStatus') == 'Pass'])
-        failed_students = total_students - passed_students
-        avg_percentage = sum(r.get('percentage', 0) for r in results) / total_students if total_students > 0 else 0
-
-        y_pos = height - 150
-        p.setFont("Helvetica-Bold", 14)
-        p.drawString(50, y_pos, "Summary Statistics")
-        p.setFont("Helvetica", 12)
-        y_pos -= 20
-        p.drawString(50, y_pos, f"Total Students: {total_students}")
-        y_pos -= 15
-        p.drawString(50, y_pos, f"Passed: {passed_students} ({(passed_students/total_students*100):.1f}%)")
-        y_pos -= 15
-        p.drawString(50, y_pos, f"Failed: {failed_students} ({(failed_students/total_students*100):.1f}%)")
-        y_pos -= 15
-        p.drawString(50, y_pos, f"Average Score: {avg_percentage:.1f}%")
-
-        # Results table
-        y_pos -= 40
-        p.setFont("Helvetica-Bold", 14)
-        p.drawString(50, y_pos, "Individual Results")
-        
-        # Table headers
-        y_pos -= 30
-        p.setFont("Helvetica", 7)  # Reduced font size for headers
-        p.drawString(50, y_pos, "Student Name")
-        p.drawString(150, y_pos, "ID")  # Adjusted x-coordinate
-        p.drawString(230, y_pos, "Locker")  # Adjusted x-coordinate
-        p.drawString(280, y_pos, "Rank")  # Adjusted x-coordinate
-        p.drawString(340, y_pos, "Exam")  # Adjusted x-coordinate
-        p.drawString(420, y_pos, "Score")  # Adjusted x-coordinate
-        p.drawString(470, y_pos, "%")  # Adjusted x-coordinate
-        p.drawString(500, y_pos, "Result")  # Adjusted x-coordinate
-
-        # Table rows
-        y_pos -= 20
-        p.setFont("Helvetica", 6)  # Reduced font size for rows
-        for result in results[:40]:  # Limit to 40 results per page
-            if y_pos < 100:  # Start new page if needed
-                p.showPage()
-                y_pos = height - 50
-                # Redraw headers on new page
-                p.setFont("Helvetica", 7)
-                p.drawString(50, y_pos, "Student Name")
-                p.drawString(150, y_pos, "ID")
-                p.drawString(230, y_pos, "Locker")
-                p.drawString(280, y_pos, "Rank")
-                p.drawString(340, y_pos, "Exam")
-                p.drawString(420, y_pos, "Score")
-                p.drawString(470, y_pos, "%")
-                p.drawString(500, y_pos, "Result")
-                y_pos -= 20
-                p.setFont("Helvetica", 6)
-
-            # Remove truncation to allow full text
-            student_name = str(result.get('studentName', ''))
-            student_id = str(result.get('studentId', ''))
-            locker = str(result.get('studentInfo', {}).get('lockerNumber', ''))
-            rank = str(result.get('studentInfo', {}).get('rank', ''))
-            exam_name = str(result.get('examName', ''))
-
-            p.drawString(50, y_pos, student_name)
-            p.drawString(150, y_pos, student_id)
-            p.drawString(230, y_pos, locker)
-            p.drawString(280, y_pos, rank)
-            p.drawString(340, y_pos, exam_name)
-            p.drawString(420, y_pos, f"{result.get('score', 0)}/{result.get('totalMarks', 0)}")
-            p.drawString(470, y_pos, f"{result.get('percentage', 0):.1f}%")
-            
-            # Color code the result
-            if result.get('passFailStatus') == 'Pass':
-                p.setFillColorRGB(0, 0.5, 0)  # Green
-            else:
-                p.setFillColorRGB(1, 0, 0)  # Red
-            p.drawString(500, y_pos, str(result.get('passFailStatus', '')))
-            p.setFillColorRGB(0, 0, 0)  # Reset to black
-            
-            y_pos -= 15
-
-        p.save()
-        buffer.seek(0)
+        buffer = await run_in_threadpool(_build_results_pdf, results)
 
         return StreamingResponse(
-            io.BytesIO(buffer.read()),
+            buffer,
             media_type="application/pdf",
             headers={"Content-Disposition": "attachment; filename=OMR_Results_Report.pdf"}
         )
@@ -211,115 +247,44 @@ async def download_all_pdf(request_data: dict):
     except Exception as e:
         raise HTTPException(status_code=500, detail="Failed to generate PDF")
 
-@router.post("/download-all-pdf")
-async def download_all_pdf(request_data: dict):
+def _build_results_xlsx(results: List[dict]):
+    """Write the results as a spreadsheet, streaming rows and spilling to disk past 1 MB"""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Results")
+    ws.append(["Student Name", "ID", "Locker", "Rank", "Exam", "Score", "Total Marks", "%", "Result"])
+    for result in results:
+        get = result.get
+        info_get = (get('studentInfo') or {}).get
+        ws.append([
+            get('studentName', ''),
+            get('studentId', ''),
+            info_get('lockerNumber', ''),
+            info_get('rank', ''),
+            get('examName', ''),
+            get('score', 0),
+            get('totalMarks', 0),
+            round(get('percentage', 0), 1),
+            get('passFailStatus', '')
+        ])
+
+    buffer = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    wb.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+@router.post("/download-all-xlsx")
+async def download_all_xlsx(request_data: dict):
     try:
-        results = request_data.get("results", [])
-        filters = request_data.get("filters", {})
-
-        # Create PDF
-        buffer = io.BytesIO()
-        p = canvas.Canvas(buffer, pagesize=letter)
-        width, height = letter
-
-        # Title
-        p.setFont("Helvetica-Bold", 20)
-        p.drawCentredString(width/2, height-50, "OMR Results Report")
-        p.setFont("Helvetica", 14)
-        p.drawCentredString(width/2, height-80, f"Generated: {datetime.now().strftime('%Y-%m-%d')}")
-
-        # Statistics
-        total_students = len(results)
-        passed_students = len([r for r in results if r.get('passFailStatus') == 'Pass'])
-        failed_students = total_students - passed_students
-        avg_percentage = sum(r.get('percentage', 0) for r in results) / total_students if total_students > 0 else 0
-
-        y_pos = height - 150
-        p.setFont("Helvetica-Bold", 14)
-        p.drawString(50, y_pos, "Summary Statistics")
-        p.setFont("Helvetica", 12)
-        y_pos -= 20
-        p.drawString(50, y_pos, f"Total Students: {total_students}")
-        y_pos -= 15
-        p.drawString(50, y_pos, f"Passed: {passed_students} ({(passed_students/total_students*100):.1f}%)")
-        y_pos -= 15
-        p.drawString(50, y_pos, f"Failed: {failed_students} ({(failed_students/total_students*100):.1f}%)")
-        y_pos -= 15
-        p.drawString(50, y_pos, f"Average Score: {avg_percentage:.1f}%")
-
-        # Results table
-        y_pos -= 40
-        p.setFont("Helvetica-Bold", 14)
-        p.drawString(50, y_pos, "Individual Results")
-        
-        # Table headers
-        y_pos -= 30
-        p.setFont("Helvetica", 7)  # Reduced font size for headers
-        p.drawString(50, y_pos, "Student Name")
-        p.drawString(130, y_pos, "ID")  # Adjusted x-coordinate
-        p.drawString(210, y_pos, "Locker")  # Adjusted x-coordinate
-        p.drawString(260, y_pos, "Rank")  # Adjusted x-coordinate
-        p.drawString(310, y_pos, "Exam")  # Adjusted x-coordinate
-        p.drawString(390, y_pos, "Score")  # Adjusted x-coordinate
-        p.drawString(440, y_pos, "%")  # Adjusted x-coordinate
-        p.drawString(470, y_pos, "Result")  # Adjusted x-coordinate
-
-        # Table rows
-        y_pos -= 20
-        p.setFont("Helvetica", 6)  # Reduced font size for rows
-        for result in results[:40]:  # Limit to 40 results per page
-            if y_pos < 100:  # Start new page if needed
-                p.showPage()
-                y_pos = height - 50
-                # Redraw headers on new page
-                p.setFont("Helvetica", 7)
-                p.drawString(50, y_pos, "Student Name")
-                p.drawString(130, y_pos, "ID")
-                p.drawString(210, y_pos, "Locker")
-                p.drawString(260, y_pos, "Rank")
-                p.drawString(310, y_pos, "Exam")
-                p.drawString(390, y_pos, "Score")
-                p.drawString(440, y_pos, "%")
-                p.drawString(470, y_pos, "Result")
-                y_pos -= 20
-                p.setFont("Helvetica", 6)
-
-            # Truncate long text
-            student_name = str(result.get('studentName', ''))[:12]  # Limit to 12 chars
-            student_id = str(result.get('studentId', ''))[:12]  # Limit to 12 chars
-            locker = str(result.get('studentInfo', {}).get('lockerNumber', ''))[:8]
-            rank = str(result.get('studentInfo', {}).get('rank', ''))[:8]
-            exam_name = str(result.get('examName', ''))[:10]
-
-            p.drawString(50, y_pos, student_name)
-            p.drawString(130, y_pos, student_id)
-            p.drawString(210, y_pos, locker)
-            p.drawString(260, y_pos, rank)
-            p.drawString(310, y_pos, exam_name)
-            p.drawString(390, y_pos, f"{result.get('score', 0)}/{result.get('totalMarks', 0)}")
-            p.drawString(440, y_pos, f"{result.get('percentage', 0):.1f}%")
-            
-            # Color code the result
-            if result.get('passFailStatus') == 'Pass':
-                p.setFillColorRGB(0, 0.5, 0)  # Green
-            else:
-                p.setFillColorRGB(1, 0, 0)  # Red
-            p.drawString(470, y_pos, str(result.get('passFailStatus', '')))
-            p.setFillColorRGB(0, 0, 0)  # Reset to black
-            
-            y_pos -= 15
-
-        p.save()
-        buffer.seek(0)
+        buffer = await run_in_threadpool(_build_results_xlsx, request_data.get("results", []))
 
         return StreamingResponse(
-            io.BytesIO(buffer.read()),
-            media_type="application/pdf",
-            headers={"Content-Disposition": "attachment; filename=OMR_Results_Report.pdf"}
+            buffer,
+            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            headers={"Content-Disposition": "attachment; filename=OMR_Results_Report.xlsx"}
         )
 
     except Exception as e:
-        raise HTTPException(status_code=500, detail="Failed to generate PDF")
+        raise HTTPException(status_code=500, detail="Failed to generate Excel report")
 
 @router.get("/exam/{exam_id}")
 async def get_exam_results(
@@ -331,13 +296,16 @@ async def get_exam_results(
     db_ops=Depends(get_database)
 ):
     try:
+        if sort_by not in RESULT_SORT_COLUMNS:
+            raise HTTPException(status_code=400, detail=f"Cannot sort results by: {sort_by}")
+
         # Verify exam exists
-        exam = await db_ops.find_one('exams', {"examId": exam_id})
-        if not exam:
+        if not await db_ops.exists('exams', {"examId": exam_id}):
             raise HTTPException(status_code=404, detail="Exam not found")
 
         sort_order_str = "DESC" if order == "desc" else "ASC"
-        skip_count = (page - 1) * limit
+        limit = max(1, min(limit, MAX_PAGE_LIMIT))
+        skip_count = (max(page, 1) - 1) * limit
 
         responses = await db_ops.find_many(
             'results', 
@@ -350,8 +318,13 @@ async def get_exam_results(
 
         total = await db_ops.count_documents('results', {"examId": exam_id})
 
-        # Calculate aggregate statistics
-        stats = await calculate_exam_stats(exam_id, db_ops)
+        # Calculate aggregate statistics, reused until the exam or its results are written
+        stats_key = (('results', 'exams'), 'stats', exam_id)
+        stats = db_ops.cached_result(stats_key)
+        if stats is None:
+            generation = db_ops.cache_generation()
+            stats = await calculate_exam_stats(exam_id, db_ops)
+            db_ops.cache_result(stats_key, stats, generation)
 
         return {
             "responses": responses,
@@ -370,11 +343,38 @@ async def get_exam_results(
         raise HTTPException(status_code=500, detail="Failed to fetch results")
 
 async def calculate_exam_stats(exam_id: str, db_ops):
-    responses = await db_ops.find_many('results', {"examId": exam_id})
-    
-    exam = await db_ops.find_one('exams', {"examId": exam_id})
+    exam = await db_ops.find_one('exams', {"examId": exam_id}, columns=['numQuestions', 'settings'])
 
-    if not responses:
+    # Score distribution
+    ranges = [
+        {"min": 0, "max": 20, "label": "0-20%"},
+        {"min": 21, "max": 40, "label": "21-40%"},
+        {"min": 41, "max": 60, "label": "41-60%"},
+        {"min": 61, "max": 80, "label": "61-80%"},
+        {"min": 81, "max": 100, "label": "81-100%"}
+    ]
+
+    stats = None
+    if exam:
+        # Let SQLite compute every figure in one pass instead of loading each result
+        # Percentage bounds are scaled by numQuestions once, so each row is compared
+        # as score * 100 with no per-row division or float rounding at the edges
+        num_questions = exam["numQuestions"]
+        passing_score = exam.get("settings", {}).get("passingScore", 60)
+        expressions = [
+            "COUNT(*) AS total",
+            "AVG(score) AS average",
+            "MAX(score) AS highest",
+            "MIN(score) AS lowest",
+            "COALESCE(SUM(score * 100 >= ?), 0) AS passing"
+        ]
+        params = [passing_score * num_questions]
+        for i, range_item in enumerate(ranges):
+            expressions.append(f"COALESCE(SUM(score * 100 BETWEEN ? AND ?), 0) AS range{i}")
+            params.extend([range_item["min"] * num_questions, range_item["max"] * num_questions])
+        stats = await db_ops.aggregate('results', expressions, {"examId": exam_id}, params)
+
+    if not stats or not stats["total"]:
         return {
             "totalStudents": 0,
             "averageScore": 0,
@@ -385,32 +385,19 @@ async def calculate_exam_stats(exam_id: str, db_ops):
             "questionAnalysis": []
         }
 
-    scores = [r["score"] for r in responses]
-    total_students = len(responses)
-    average_score = sum(scores) / total_students if total_students > 0 else 0
-    highest_score = max(scores) if scores else 0
-    lowest_score = min(scores) if scores else 0
-    
-    passing_score = exam.get("settings", {}).get("passingScore", 60)
-    passing_count = len([s for s in scores if (s / exam["numQuestions"]) * 100 >= passing_score])
-    passing_rate = (passing_count / total_students) * 100 if total_students > 0 else 0
-
-    # Score distribution
-    ranges = [
-        {"min": 0, "max": 20, "label": "0-20%"},
-        {"min": 21, "max": 40, "label": "21-40%"},
-        {"min": 41, "max": 60, "label": "41-60%"},
-        {"min": 61, "max": 80, "label": "61-80%"},
-        {"min": 81, "max": 100, "label": "81-100%"}
-    ]
+    total_students = stats["total"]
+    average_score = stats["average"]
+    highest_score = stats["highest"]
+    lowest_score = stats["lowest"]
+    passing_rate = (stats["passing"] / total_students) * 100
 
     score_distribution = []
-    for range_item in ranges:
-        count = len([s for s in scores if range_item["min"] <= (s / exam["numQuestions"]) * 100 <= range_item["max"]])
+    for i, range_item in enumerate(ranges):
+        count = stats[f"range{i}"]
         score_distribution.append({
             "range": range_item["label"],
             "count": count,
-            "percentage": (count / total_students) * 100 if total_students > 0 else 0
+            "percentage": (count / total_students) * 100
         })
 
     return {
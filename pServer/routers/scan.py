@@ -17,7 +17,7 @@ from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image as RL
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.lib.units import inch
 import json
-from database import db_operations
+from database import database, db_operations, utc_timestamp
 # OCR functionality
 try:
     import pytesseract
@@ -73,9 +73,8 @@ class StudentInfo:
         self.raw_text = ""
         self.confidence = 0.0
 
-def get_database():
-    from main import app
-    return app.state.database
+async def get_database():
+    return database
 
 def auto_rotate_image(img: np.ndarray) -> Tuple[np.ndarray, float]:
     """Detect and correct the orientation of a scanned image."""
@@ -927,12 +926,12 @@ async def process_answer_sheet(
             raise HTTPException(status_code=400, detail="File must be an image")
         
         # Use db_operations instead of db.exams
-        exam = await db_operations.find_one("exams", {"examId": examId})
+        exam = await db_operations.find_one("exams", {"examId": examId}, columns=["numQuestions", "marksPerMcq", "passingPercentage"])
         if not exam:
             raise HTTPException(status_code=404, detail="Exam not found")
         
         # Use db_operations instead of db.solutions
-        solution = await db_operations.find_one("solutions", {"examId": examId})
+        solution = await db_operations.find_one("solutions", {"examId": examId}, columns=["solutions"])
         if not solution:
             raise HTTPException(status_code=404, detail="Answer key not found for this exam")
         
@@ -976,7 +975,7 @@ async def process_answer_sheet(
                 "processedImage": processing_result["processedImage"],
                 "passFailStatus": processing_result["passFailStatus"]
             },
-            "processingTime": datetime.utcnow().isoformat(),
+            "processingTime": utc_timestamp(),
             "imageProcessed": True
         }
         
@@ -999,12 +998,12 @@ async def batch_process_answer_sheets(
         logger.info(f"Batch processing {len(images)} answer sheets for exam {examId}")
         
         # Use db_operations to query the exams table
-        exam = await db_operations.find_one("exams", {"examId": examId})
+        exam = await db_operations.find_one("exams", {"examId": examId}, columns=["numQuestions", "marksPerMcq", "passingPercentage"])
         if not exam:
             raise HTTPException(status_code=404, detail="Exam not found")
         
         # Use db_operations to query the solutions table
-        solution = await db_operations.find_one("solutions", {"examId": examId})
+        solution = await db_operations.find_one("solutions", {"examId": examId}, columns=["solutions"])
         if not solution:
             raise HTTPException(status_code=404, detail="Answer key not found for this exam")
         
@@ -1081,7 +1080,7 @@ async def batch_process_answer_sheets(
             "processedSuccessfully": len([r for r in results if r.get("success", False)]),
             "results": results,
             "processedImages": processed_images_data,
-            "processingTime": datetime.utcnow().isoformat()
+            "processingTime": utc_timestamp()
         }
         
     except HTTPException:
@@ -1,19 +1,30 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from typing import List
-import pdfplumber
+from typing import AbstractSet, List, NamedTuple, Optional, Tuple
+import pymupdf
 from models.solution import Solution, SolutionItem
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
 import logging
 import re
+import time
+from database import db_operations
 
 router = APIRouter()
 
 # Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Patterns and labels matched against every word of an uploaded answer-key PDF
+QUESTION_NUMBER_RE = re.compile(r'^\d+\.$')
+NUMBER_RE = re.compile(r'(\d+)')
+OPTION_LABELS = frozenset(('a.', 'b.', 'c.', 'd.', 'e.'))
+# Largest answer-key PDF read into memory for parsing
+MAX_PDF_SIZE = 50 * 1024 * 1024
+# Readers accept the %PDF- header anywhere in the first 1024 bytes
+PDF_HEADER_WINDOW = 1024
+
 class ManualSolutionRequest(BaseModel):
     examId: str
     solutions: List[SolutionItem]
@@ -22,67 +33,77 @@ class SolutionItem(BaseModel):
     question: int
     answer: str
 
-def get_database():
-    from main import app
-    return app.state.db_operations
-
-def extract_answers_from_pdf(pdf_file) -> List[SolutionItem]:
+class BufferedWord(NamedTuple):
+    """A word of the current question, lowercased and with its bold flag worked out once"""
+    text: str
+    is_bold: bool
+
+async def get_database():
+    return db_operations
+
+def page_words(page) -> List[Tuple[str, bool]]:
+    """Split a page's text spans into words, each tagged with MuPDF's bold flag for its span"""
+    words = []
+    for block in page.get_text("dict", sort=True)["blocks"]:
+        for line in block.get("lines", ()):
+            for span in line["spans"]:
+                is_bold = bool(span["flags"] & pymupdf.TEXT_FONT_BOLD)
+                words.extend((text, is_bold) for text in span["text"].split())
+    return words
+
+def extract_answers_from_pdf(pdf_bytes: bytes) -> Tuple[List[SolutionItem], AbstractSet[int]]:
+    """Parse the answer key from the PDF's bytes, along with the question numbers found.
+
+    Blocking, so run it off the event loop.
+    """
     solutions = []
+    seen_questions = {}  # Question number -> first answer found, for duplicate checks
     current_question = None
-    question_buffer = []  # Buffer to accumulate question-related text across pages
+    question_buffer = []  # Option labels of the current question and the word after each, across pages
     processing_answer = False  # Flag to track if we're processing answer options
     previous_page_last_text = ""  # Track last text of previous page for continuity
-    expected_options = set('abcde')  # Track collected options to ensure completeness
 
     try:
-        with pdfplumber.open(pdf_file.file) as pdf:
-            logger.info(f"Processing PDF with {len(pdf.pages)} pages")
-            for page_num, page in enumerate(pdf.pages):
-                logger.debug(f"Processing page {page_num + 1}")
+        with pymupdf.open(stream=pdf_bytes, filetype="pdf") as pdf:
+            logger.info(f"Processing PDF with {pdf.page_count} pages")
+            for page_num, page in enumerate(pdf):
+                logger.debug("Processing page %d", page_num + 1)
                 # Extract words with formatting information
-                words = page.extract_words(extra_attrs=["fontname", "size"])
+                words = page_words(page)
                 if not words:
                     logger.warning(f"No text extracted from page {page_num + 1}")
                     continue
 
-                i = 0
                 # Prepend last text from previous page to handle split questions
                 if previous_page_last_text and question_buffer:
-                    question_buffer.append({
-                        'text': previous_page_last_text,
-                        'fontname': '',
-                        'size': 0
-                    })
+                    carried_text = previous_page_last_text.lower()
+                    if carried_text in OPTION_LABELS or question_buffer[-1].text in OPTION_LABELS:
+                        question_buffer.append(BufferedWord(carried_text, False))
                 
-                while i < len(words):
-                    word = words[i]
-                    text = word['text'].strip()
+                for i, (text, is_bold) in enumerate(words):
+                    text_lower = text.lower()
 
                     # Detect question number (e.g., "1.", "2.", or "Question 3")
-                    if re.match(r'^\d+\.$', text) or text.lower().startswith('question'):
+                    if QUESTION_NUMBER_RE.match(text) or text_lower.startswith('question'):
                         try:
                             # Save previous question if we have a valid answer
                             if current_question and question_buffer:
-                                answer = identify_answer(question_buffer, expected_options)
+                                answer = identify_answer(question_buffer)
                                 if answer:
-                                    existing_solution = next((s for s in solutions if s.question == current_question), None)
-                                    if existing_solution:
-                                        logger.warning(f"Duplicate answer for question {current_question}. Keeping first: {existing_solution.answer}")
+                                    if current_question in seen_questions:
+                                        logger.warning(f"Duplicate answer for question {current_question}. Keeping first: {seen_questions[current_question]}")
                                     else:
+                                        seen_questions[current_question] = answer
                                         solutions.append(SolutionItem(question=current_question, answer=answer))
-                                        logger.debug(f"Added solution: question={current_question}, answer={answer}")
+                                        logger.debug("Added solution: question=%s, answer=%s", current_question, answer)
                             
                             # Start new question
-                            if re.match(r'^\d+\.$', text):
+                            if QUESTION_NUMBER_RE.match(text):
                                 current_question = int(text.split('.')[0])
                             else:
-                                number_text = ''
-                                j = i
-                                look_ahead_limit = min(i + 5, len(words))
-                                while j < look_ahead_limit:
-                                    number_text += words[j]['text'] + ' '
-                                    j += 1
-                                number_match = re.search(r'(\d+)', number_text.replace('Question', '').replace('of', '').replace('DPG', ''))
+                                # Peek at this word and the four after it without consuming them
+                                number_text = ''.join(f"{word} " for word, _ in words[i:i + 5])
+                                number_match = NUMBER_RE.search(number_text.replace('Question', '').replace('of', '').replace('DPG', ''))
                                 if number_match:
                                     current_question = int(number_match.group(1))
                                 else:
@@ -90,42 +111,34 @@ def extract_answers_from_pdf(pdf_file) -> List[SolutionItem]:
                                     logger.warning(f"Could not extract question number from: {number_text}")
                             question_buffer = []
                             processing_answer = False
-                            expected_options = set()
-                            logger.debug(f"Found question number: {current_question}")
+                            logger.debug("Found question number: %s", current_question)
                         except (ValueError, IndexError):
                             logger.warning(f"Invalid question number format: {text}")
                             current_question = None
-                        i += 1
                         continue
 
-                    # Accumulate text in buffer
+                    # Buffer only what identify_answer reads: the option labels and the
+                    # word right after each one, whose bold flag can mark the answer too
                     if current_question:
-                        question_buffer.append({
-                            'text': text,
-                            'fontname': word.get('fontname', ''),
-                            'size': word.get('size', 0)
-                        })
-                        
-                        # Detect start of answer options
-                        if text.lower() in ('a.', 'b.', 'c.', 'd.', 'e.'):
+                        if text_lower in OPTION_LABELS:
                             processing_answer = True
-                            expected_options.add(text[0].lower())
-
-                    i += 1
+                            question_buffer.append(BufferedWord(text_lower, is_bold))
+                        elif question_buffer and question_buffer[-1].text in OPTION_LABELS:
+                            question_buffer.append(BufferedWord(text_lower, is_bold))
                 
                 # Store the last text of the current page for continuity
-                previous_page_last_text = words[-1]['text'].strip() if words else ""
+                previous_page_last_text = words[-1][0] if words else ""
 
             # Process the last question after the loop
             if current_question and question_buffer:
-                answer = identify_answer(question_buffer, expected_options)
+                answer = identify_answer(question_buffer)
                 if answer:
-                    existing_solution = next((s for s in solutions if s.question == current_question), None)
-                    if existing_solution:
-                        logger.warning(f"Duplicate answer for question {current_question}. Keeping first: {existing_solution.answer}")
+                    if current_question in seen_questions:
+                        logger.warning(f"Duplicate answer for question {current_question}. Keeping first: {seen_questions[current_question]}")
                     else:
+                        seen_questions[current_question] = answer
                         solutions.append(SolutionItem(question=current_question, answer=answer))
-                        logger.debug(f"Added solution: question={current_question}, answer={answer}")
+                        logger.debug("Added solution: question=%s, answer=%s", current_question, answer)
 
     except Exception as e:
         logger.error(f"Failed to parse PDF: {str(e)}")
@@ -143,31 +156,18 @@ def extract_answers_from_pdf(pdf_file) -> List[SolutionItem]:
     for solution in solutions:
         logger.info(f"Question {solution.question}: {solution.answer}")
 
-    # Check for missing questions
-    expected_questions = set(range(1, len(solutions) + 1))
-    actual_questions = set(solution.question for solution in solutions)
-    missing_questions = expected_questions - actual_questions
-
-    if missing_questions:
-        logger.warning(f"Missing questions detected: {sorted(missing_questions)}")
-
     logger.info(f"Extracted {len(solutions)} solutions")
-    return solutions
+    return solutions, seen_questions.keys()
 
-def identify_answer(question_buffer: List[dict], expected_options: set) -> str:
+def identify_answer(question_buffer: List[BufferedWord]) -> Optional[str]:
     """Identify the correct answer from the question buffer based on bold formatting."""
-    collected_options = set()
     for i, item in enumerate(question_buffer):
-        text = item['text'].lower()
-        if text in ('a.', 'b.', 'c.', 'd.', 'e.'):
-            collected_options.add(text[0])
-            is_bold = 'bold' in item.get('fontname', '').lower()
-            if not is_bold and i + 1 < len(question_buffer):
-                next_item = question_buffer[i + 1]
-                is_bold = 'bold' in next_item.get('fontname', '').lower()
-            if is_bold and collected_options.issubset(expected_options):
+        text = item.text
+        if text in OPTION_LABELS:
+            # The bold may be on the label itself or only on the option text after it
+            if item.is_bold or (i + 1 < len(question_buffer) and question_buffer[i + 1].is_bold):
                 return text[0].upper()
-    return None if not collected_options.issubset(expected_options) else None
+    return None
 
 @router.post("/{exam_id}/upload")
 async def upload_solution(exam_id: str, file: UploadFile = File(...), db_ops=Depends(get_database)):
@@ -181,20 +181,31 @@ async def upload_solution(exam_id: str, file: UploadFile = File(...), db_ops=Dep
         if not file.filename.lower().endswith('.pdf'):
             logger.error(f"Invalid file extension: {file.filename}")
             raise HTTPException(status_code=400, detail="Only PDF files are allowed")
+        if file.size and file.size > MAX_PDF_SIZE:
+            logger.error(f"PDF too large: {file.size} bytes")
+            raise HTTPException(status_code=413, detail="PDF too large")
+
+        # Read the upload once; the parser works from these bytes
+        pdf_bytes = await file.read()
+        if len(pdf_bytes) > MAX_PDF_SIZE:
+            logger.error(f"PDF too large: {len(pdf_bytes)} bytes")
+            raise HTTPException(status_code=413, detail="PDF too large")
+        if b"%PDF-" not in pdf_bytes[:PDF_HEADER_WINDOW]:
+            logger.error(f"Not a PDF: {file.filename}")
+            raise HTTPException(status_code=400, detail="Not a valid PDF file")
 
         logger.info(f"Uploading solution for exam_id: {exam_id}, file: {file.filename}, size: {file.size} bytes")
 
-        exam_data = await db_ops.find_one('exams', {"examId": exam_id})
+        exam_data = await db_ops.find_one('exams', {"examId": exam_id}, columns=['numQuestions'])
         if not exam_data:
             logger.error(f"Exam not found: {exam_id}")
             raise HTTPException(status_code=404, detail="Exam not found")
 
-        solutions_data = extract_answers_from_pdf(file)
+        solutions_data, actual_questions = await run_in_threadpool(extract_answers_from_pdf, pdf_bytes)
         logger.info(f"Expected {exam_data['numQuestions']} solutions, got {len(solutions_data)}")
         
         if len(solutions_data) != exam_data['numQuestions']:
             expected_questions = set(range(1, exam_data['numQuestions'] + 1))
-            actual_questions = set(solution.question for solution in solutions_data)
             missing_questions = expected_questions - actual_questions
             extra_questions = actual_questions - expected_questions
             
@@ -207,24 +218,23 @@ async def upload_solution(exam_id: str, file: UploadFile = File(...), db_ops=Dep
             logger.error(error_msg)
             raise HTTPException(status_code=400, detail=error_msg)
 
-        await db_ops.delete_one('solutions', {"examId": exam_id})
-        logger.info(f"Deleted existing solutions for exam_id: {exam_id}")
-
-        solutions_dict = [solution.dict() for solution in solutions_data]
-
-        new_solution = Solution(
-            examId=exam_id,
-            solutions=solutions_dict
-        )
-        await db_ops.insert_one('solutions', new_solution.dict())
-        logger.info(f"Saved new solution for exam_id: {exam_id}")
+        # The parser only emits A-E answers, so build the row straight from its
+        # items instead of validating them into a Solution just to dump it again
+        solution_doc = {
+            "examId": exam_id,
+            "solutions": [solution.model_dump() for solution in solutions_data],
+            "uploadedAt": time.time_ns()
+        }
 
-        await db_ops.update_one(
-            'exams',
-            {"examId": exam_id},
-            {"solutionUploaded": True}
-        )
-        logger.info(f"Updated exam {exam_id} with solutionUploaded: True")
+        # Replace the answer key and flag the exam in one transaction (a single commit)
+        async with db_ops.transaction():
+            await db_ops.upsert_one('solutions', {"examId": exam_id}, solution_doc)
+            await db_ops.update_one(
+                'exams',
+                {"examId": exam_id},
+                {"solutionUploaded": True}
+            )
+        logger.info(f"Replaced solution for exam_id: {exam_id} and set solutionUploaded: True")
 
         return {
             "message": "Solution uploaded successfully",
@@ -247,7 +257,7 @@ async def manual_solution(exam_id: str, request: ManualSolutionRequest, db_ops=D
 
         logger.info(f"Saving manual solution for exam_id: {exam_id}, solutions count: {len(request.solutions)}")
 
-        exam_data = await db_ops.find_one('exams', {"examId": exam_id})
+        exam_data = await db_ops.find_one('exams', {"examId": exam_id}, columns=['numQuestions'])
         if not exam_data:
             logger.error(f"Exam not found: {exam_id}")
             raise HTTPException(status_code=404, detail="Exam not found")
@@ -273,24 +283,21 @@ async def manual_solution(exam_id: str, request: ManualSolutionRequest, db_ops=D
         # Sort solutions by question number
         solutions_data.sort(key=lambda x: x.question)
 
-        await db_ops.delete_one('solutions', {"examId": exam_id})
-        logger.info(f"Deleted existing solutions for exam_id: {exam_id}")
-
-        solutions_dict = [solution.dict() for solution in solutions_data]
-
+        # Already validated as SolutionItem, so hand the instances over as-is
         new_solution = Solution(
             examId=exam_id,
-            solutions=solutions_dict
+            solutions=solutions_data
         )
-        await db_ops.insert_one('solutions', new_solution.dict())
-        logger.info(f"Saved new solution for exam_id: {exam_id}")
 
-        await db_ops.update_one(
-            'exams',
-            {"examId": exam_id},
-            {"solutionUploaded": True}
-        )
-        logger.info(f"Updated exam {exam_id} with solutionUploaded: True")
+        # Replace the answer key and flag the exam in one transaction (a single commit)
+        async with db_ops.transaction():
+            await db_ops.upsert_one('solutions', {"examId": exam_id}, new_solution.model_dump())
+            await db_ops.update_one(
+                'exams',
+                {"examId": exam_id},
+                {"solutionUploaded": True}
+            )
+        logger.info(f"Replaced solution for exam_id: {exam_id} and set solutionUploaded: True")
 
         return {
             "message": "Solution saved successfully",
@@ -305,8 +312,22 @@ async def manual_solution(exam_id: str, request: ManualSolutionRequest, db_ops=D
         raise HTTPException(status_code=500, detail=f"Failed to save solution: {str(error)}")
 
 @router.get("/{exam_id}")
-async def get_solution(exam_id: str, db_ops=Depends(get_database)):
+async def get_solution(exam_id: str, fields: Optional[str] = None, db_ops=Depends(get_database)):
     try:
+        if fields == "count":
+            # Existence and answer count only, worked out in SQL without loading the key
+            summary = await db_ops.aggregate(
+                'solutions',
+                ["COUNT(*) AS found", "MAX(json_array_length(solutions)) AS solutionCount"],
+                {"examId": exam_id}
+            )
+            if not summary['found']:
+                logger.error(f"Solution not found for exam_id: {exam_id}")
+                raise HTTPException(status_code=404, detail="Solution not found")
+            return {"examId": exam_id, "solutionCount": summary['solutionCount']}
+        if fields is not None:
+            raise HTTPException(status_code=400, detail=f"Unsupported fields value: {fields}")
+
         solution_doc = await db_ops.find_one('solutions', {"examId": exam_id})
         if not solution_doc:
             logger.error(f"Solution not found for exam_id: {exam_id}")
@@ -315,6 +336,8 @@ async def get_solution(exam_id: str, db_ops=Depends(get_database)):
         logger.info(f"Retrieved solution for exam_id: {exam_id}")
         return solution_doc
 
+    except HTTPException:
+        raise
     except Exception as error:
         logger.error(f"Get solution error: {str(error)}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch solution: {str(error)}")
\ No newline at end of file
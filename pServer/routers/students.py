@@ -4,13 +4,13 @@ from typing import List
 import pandas as pd
 import io
 from models.student import StudentCreate, StudentResponse
-from datetime import datetime
+import time
+from database import db_operations
 
 router = APIRouter()
 
-def get_database():
-    from main import app
-    return app.state.db_operations
+async def get_database():
+    return db_operations
 
 @router.post("/{exam_id}/upload")
 async def upload_students(
@@ -23,8 +23,7 @@ async def upload_students(
             raise HTTPException(status_code=400, detail="File must be Excel format")
         
         # Verify exam exists
-        exam = await db_ops.find_one('exams', {"examId": exam_id})
-        if not exam:
+        if not await db_ops.exists('exams', {"examId": exam_id}):
             raise HTTPException(status_code=404, detail="Exam not found")
         
         # Read Excel file
@@ -44,9 +43,6 @@ async def upload_students(
                 detail=f"Missing required columns: {', '.join(missing_columns)}"
             )
         
-        # Clear existing students for this exam
-        await db_ops.delete_many('students', {"examId": exam_id})
-        
         # Process and save students
         students = []
         for i, row in df.iterrows():
@@ -59,23 +55,22 @@ async def upload_students(
                 "lockerNumber": str(row['Locker number']).strip(),
                 "rank": str(row['Rank']).strip(),
                 "copyNumber": str(i + 1).zfill(3),
-                "createdAt": datetime.utcnow()
+                "createdAt": time.time_ns()
             }
             students.append(student_data)
         
         if not students:
             raise HTTPException(status_code=400, detail="No valid student data found")
         
-        # Insert students one by one since SQLite doesn't have insert_many
-        for student in students:
-            await db_ops.insert_one('students', student)
-        
-        # Update exam to mark students as uploaded
-        await db_ops.update_one(
-            'exams',
-            {"examId": exam_id},
-            {"studentsUploaded": True}
-        )
+        # Replace the roster and flag the exam in one transaction (a single commit)
+        async with db_ops.transaction():
+            await db_ops.delete_many('students', {"examId": exam_id})
+            await db_ops.insert_many('students', students)
+            await db_ops.update_one(
+                'exams',
+                {"examId": exam_id},
+                {"studentsUploaded": True}
+            )
         
         return {
             "message": "Students uploaded successfully",
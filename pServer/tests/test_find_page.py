@@ -0,0 +1,54 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+
+import orjson
+
+from database import database, db_operations
+
+
+class FindPageCursorTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        database.db_path = os.path.join(self.tmpdir.name, "test.db")
+        await database.connect()
+
+    async def asyncTearDown(self):
+        await db_operations.flush()
+        await database.disconnect()
+        self.tmpdir.cleanup()
+
+    async def test_cursor_survives_float64_round_trip(self):
+        # A bulk save stamps every row with one processedAt, well past 2**53 in nanoseconds
+        processed_at = time.time_ns()
+        await db_operations.insert_many('results', [
+            {
+                "examId": "EXAM", "studentId": f"S{i:03d}", "examName": "X", "responses": [],
+                "score": 0, "totalMarks": 0, "percentage": 0.0, "passFailStatus": "Fail",
+                "correctAnswers": 0, "incorrectAnswers": 0, "blankAnswers": 0, "multipleMarks": 0,
+                "processedAt": processed_at
+            }
+            for i in range(450)
+        ])
+
+        seen = []
+        cursor = None
+        # Bounded, so a cursor that stops matching fails the test instead of looping forever
+        for _ in range(5):
+            rows, cursor = await db_operations.find_page(
+                'results', {"examId": "EXAM"}, sort_by="processedAt", limit=200, cursor=cursor
+            )
+            seen.extend(row["id"] for row in rows)
+            # JavaScript parses every JSON number as a float64
+            cursor = json.loads(orjson.dumps({"nextCursor": cursor}), parse_int=float)["nextCursor"]
+            if not cursor:
+                break
+
+        self.assertEqual(len(seen), 450)
+        self.assertEqual(len(set(seen)), 450)
+
+
+if __name__ == "__main__":
+    unittest.main()
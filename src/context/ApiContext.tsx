@@ -104,6 +104,11 @@ const createElectronAPI = () => {
           const images = data.getAll('images') as File[];
           
           if (images.length > 0) {
+            // Prefer handing Python the file paths; fall back to base64 for files without one
+            const imagePaths = images.map(img => electronAPI.getPathForFile?.(img) || '');
+            if (imagePaths.every(Boolean)) {
+              return { data: await electronAPI.api.batchProcessOMRFiles(examId, imagePaths) };
+            }
             const imagesData = await Promise.all(images.map(img => fileToBase64(img)));
             return { data: await electronAPI.api.batchProcessOMR(examId, imagesData) };
           }
@@ -113,7 +118,7 @@ const createElectronAPI = () => {
         return { data: await electronAPI.api.saveResult(data) };
       } else if (endpoint === '/results/publish') {
         // Handle publishing results (save multiple results)
-        const promises = data.results.map((result: any) => electronAPI.api.saveResult({
+        await electronAPI.api.saveResultsBulk(data.results.map((result: any) => ({
           examId: data.examId,
           studentId: result.studentId,
           studentName: result.studentName,
@@ -128,8 +133,7 @@ const createElectronAPI = () => {
           multipleMarks: result.multipleMarks,
           responses: result.responses,
           studentInfo: result.studentInfo,
-        }));
-        await Promise.all(promises);
+        })));
         return { data: { message: `Successfully published ${data.results.length} results` } };
       } else if (endpoint === '/results/download-all-pdf') {
         // For PDF generation, we'll need to implement this differently